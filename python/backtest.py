@@ -0,0 +1,155 @@
+"""Offline backtest of the EMA + Supertrend Renko strategy.
+
+Mirrors the order handling in ``cBot/EMA_Reversal_Supertrend.cs``:
+
+* every BUY/SELL signal opens a fresh ``volume``-unit market position
+  (positions are not netted, several may be open at once);
+* each position carries a ``stop_loss_pips`` stop-loss;
+* open positions are closed when Supertrend on the last closed bar flips
+  against them (longs when Supertrend is above Close, shorts when below).
+
+Decisions are taken on the close of bar ``i`` and filled at ``Close[i]``,
+the same price the scripts report for a signal.  A stop is checked
+intrabar and takes precedence over a flip exit on the same bar.
+
+Entry/exit bars, flip lookups, P&L, the mark-to-market equity curve and
+drawdown are all computed with array operations; only the stop search
+runs per trade, over a slice bounded by that trade's flip exit.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from signals import BUY, SELL
+
+BacktestResult = namedtuple('BacktestResult', ['trades', 'equity', 'stats'])
+
+TRADE_COLUMNS = [
+    'entry_index', 'exit_index', 'entry_time', 'exit_time', 'side',
+    'entry_price', 'exit_price', 'exit_reason', 'pips', 'pnl',
+]
+
+
+def _next_true(mask):
+    """``out[k]`` = first index >= k where ``mask`` is True (``len(mask)`` if none)."""
+    n = mask.size
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def run_backtest(renko, codes, st_col='ST', stop_loss_pips=5.0, pip_size=0.0001, volume=10000):
+    """Simulate the cBot on a Renko frame and its signal codes.
+
+    ``renko`` needs Date/Open/High/Low/Close and the Supertrend column
+    ``st_col``; ``codes`` is the output of ``signals.compute_signals``.
+    Returns a ``BacktestResult`` of (trades frame, equity Series, stats dict).
+    """
+    result = backtest_arrays(
+        renko['Date'].to_numpy(), renko['Open'], renko['High'], renko['Low'], renko['Close'],
+        renko[st_col], codes, stop_loss_pips=stop_loss_pips, pip_size=pip_size, volume=volume,
+    )
+    result.equity.index = renko.index
+    return result
+
+
+def backtest_arrays(dates, opens, highs, lows, closes, supertrend, codes,
+                    stop_loss_pips=5.0, pip_size=0.0001, volume=10000):
+    """``run_backtest`` on plain arrays (no frame needed, inputs are not copied)."""
+    dates = np.asarray(dates)
+    opens, highs, lows, closes, supertrend = (
+        np.asarray(a, dtype=np.float64) for a in (opens, highs, lows, closes, supertrend)
+    )
+    codes = np.asarray(codes)
+    n = closes.size
+
+    entries = np.flatnonzero((codes == BUY) | (codes == SELL))
+    sides = codes[entries].astype(np.int64)
+    entry_prices = closes[entries]
+    stop_distance = stop_loss_pips * pip_size
+    stops = entry_prices - sides * stop_distance
+
+    # Flip exit: at bar j, using Supertrend on bar j-1.  A position opened at
+    # bar i is first checked at bar i+1, i.e. against Supertrend on bar i.
+    next_flip_long = _next_true(supertrend > closes)
+    next_flip_short = _next_true(supertrend < closes)
+    flip_at = np.where(sides == BUY, next_flip_long[entries], next_flip_short[entries]) + 1
+    flip_at = np.minimum(flip_at, n)
+
+    exit_index = flip_at.copy()
+    exit_prices = np.where(flip_at < n, closes[np.minimum(flip_at, n - 1)], closes[-1] if n else np.nan)
+    reasons = np.where(flip_at < n, 'flip', 'open').astype(object)
+
+    # Stop-loss search, bounded by each trade's flip bar (inclusive: the stop
+    # is hit intrabar before the flip is evaluated on that bar's close).
+    for t in range(entries.size):
+        start = entries[t] + 1
+        stop_end = min(flip_at[t] + 1, n)
+        if start >= stop_end:
+            continue
+        if sides[t] == BUY:
+            hit = np.flatnonzero(lows[start:stop_end] <= stops[t])
+        else:
+            hit = np.flatnonzero(highs[start:stop_end] >= stops[t])
+        if hit.size:
+            k = start + int(hit[0])
+            exit_index[t] = k
+            # A brick opening beyond the stop fills at its open
+            exit_prices[t] = min(stops[t], opens[k]) if sides[t] == BUY else max(stops[t], opens[k])
+            reasons[t] = 'stop'
+
+    still_open = exit_index >= n
+    exit_index = np.minimum(exit_index, n - 1)
+    price_move = (exit_prices - entry_prices) * sides
+    pnl = price_move * volume
+
+    trades = pd.DataFrame({
+        'entry_index': entries,
+        'exit_index': exit_index,
+        'entry_time': dates[entries],
+        'exit_time': dates[exit_index] if n else dates[:0],
+        'side': np.where(sides == BUY, 'BUY', 'SELL'),
+        'entry_price': entry_prices,
+        'exit_price': exit_prices,
+        'exit_reason': reasons,
+        'pips': price_move / pip_size,
+        'pnl': pnl,
+    }, columns=TRADE_COLUMNS)
+
+    # Mark-to-market equity: realised P&L plus open positions valued at Close
+    closed_pnl = np.where(still_open, 0.0, pnl)
+    realised = np.cumsum(np.bincount(exit_index[~still_open], weights=closed_pnl[~still_open], minlength=n))
+    qty = (sides * volume).astype(np.float64)
+    close_at = np.where(still_open, n, exit_index)
+    open_qty = np.cumsum(np.bincount(entries, weights=qty, minlength=n + 1)
+                         - np.bincount(close_at, weights=qty, minlength=n + 1))[:n]
+    open_cost = np.cumsum(np.bincount(entries, weights=qty * entry_prices, minlength=n + 1)
+                          - np.bincount(close_at, weights=qty * entry_prices, minlength=n + 1))[:n]
+    equity = pd.Series(realised + open_qty * closes - open_cost, name='equity')
+
+    drawdown = equity - equity.cummax()
+    closed = ~still_open
+    wins = int((pnl[closed] > 0).sum())
+    stats = {
+        'trades': int(entries.size),
+        'closed_trades': int(closed.sum()),
+        'win_rate': wins / int(closed.sum()) if closed.any() else float('nan'),
+        'total_pnl': float(equity.iloc[-1]) if n else 0.0,
+        'realised_pnl': float(pnl[closed].sum()),
+        'max_drawdown': float(drawdown.min()) if n else 0.0,
+        'stop_exits': int((reasons == 'stop').sum()),
+        'flip_exits': int((reasons == 'flip').sum()),
+    }
+    return BacktestResult(trades, equity, stats)
+
+
+if __name__ == '__main__':
+    from renko_cache import load_renko
+    from signals import renko_signals
+
+    renko = load_renko("EURUSD_1min.csv", brick_size=0.0010, fast_length=100, slow_length=300,
+                       st_length=2, st_multiplier=30)
+    result = run_backtest(renko, renko_signals(renko, 'EMA100', 'EMA300'))
+    print(result.trades.tail(20).to_string())
+    for key, value in result.stats.items():
+        print(f"{key:>14}: {value}")
@@ -0,0 +1,288 @@
+"""Benchmark suite for the Renko pipeline with a stored regression baseline.
+
+Every stage - Renko building, batch and streaming indicators, signals,
+backtest, WebSocket serialisation (JSON and binary), chart rendering - and
+the end-to-end pipeline runs on ``synthetic`` data at each input size.
+Per stage and size the suite records the best wall time of ``--repeat``
+runs, the peak traced memory of a separate run under ``tracemalloc`` (so
+tracing never slows the timed runs) and throughput in input rows and
+stage items (bricks, messages, frames) per second.
+
+Results go to JSON.  With a baseline (``bench_baseline.json`` next to this
+file by default) every stage and size found in both is compared, and the
+run exits non-zero when one is slower than ``--threshold`` or uses more
+memory than ``--memory-threshold`` relative to the baseline.  Timings under
+``MIN_SECONDS`` are compared at that floor so timer noise on tiny inputs is
+not reported as a regression.  Baselines are machine specific: refresh the
+stored one with ``--save-baseline`` on the machine that runs the check.
+
+Usage::
+
+    python bench.py [--sizes 1e3,1e4,1e5,1e6] [--stages renko,pipeline] [--output results.json]
+    python bench.py --sizes 1e3,1e4,1e5,1e6,1e7 --save-baseline
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'web', 'backend'))
+from backtest import backtest_arrays
+from indicators import StreamingIndicators, indicator_arrays
+from renko import renko_bricks
+from signals import ST_CURR, compute_signals
+from synthetic import generate
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+MIN_SECONDS = 0.005
+
+# Bricks of two per-bar sigmas: roughly one brick per four input rows
+BRICK_SIZE = 0.0002
+PARAMS = dict(fast_length=100, slow_length=300, st_length=2, st_multiplier=30)
+SIGNAL_START = PARAMS['slow_length'] + 1
+
+
+class _Inputs:
+    """Input rows and every intermediate result, built once per size."""
+
+    def __init__(self, rows, seed=0):
+        columns = next(generate(rows, seed=seed, freq='1min')) if rows <= 1_000_000 else None
+        if columns is None:
+            blocks = list(generate(rows, seed=seed, freq='1min'))
+            columns = {name: np.concatenate([b[name] for b in blocks]) for name in ('Date', 'Close')}
+        self.rows = rows
+        self.dates = columns['Date']
+        self.close = columns['Close']
+        index, self.opens, self.highs, self.lows, self.closes = renko_bricks(self.close, BRICK_SIZE)
+        self.brick_dates = self.dates[index]
+        self.bricks = self.closes.size
+        values, _ = indicator_arrays(self.highs, self.lows, self.closes, **PARAMS)
+        self.ema_fast, self.ema_slow, self.supertrend = values['ema_fast'], values['ema_slow'], values['supertrend']
+        self.codes = compute_signals(self.opens, self.highs, self.lows, self.closes, self.ema_fast,
+                                     self.ema_slow, self.supertrend, st_bar=ST_CURR, start=SIGNAL_START)
+        self._updates = None
+
+    def updates(self, limit):
+        """The chart feed's ``(index, update)`` pairs for the last ``limit`` bricks."""
+        if self._updates is None or len(self._updates) != min(limit, self.bricks):
+            first = max(self.bricks - limit, 0)
+            labels = {1: 'BUY', -1: 'SELL'}
+            stamps = np.datetime_as_string(self.brick_dates[first:].view('datetime64[ns]'), unit='s')
+            self._updates = [(first + k, {
+                'timestamp': ts.replace('T', ' '), 'price': c, 'ema100': f, 'ema300': s,
+                'supertrend': st, 'signal': labels.get(code, ''),
+            }) for k, (ts, c, f, s, st, code) in enumerate(zip(
+                stamps.tolist(), self.closes[first:].tolist(), self.ema_fast[first:].tolist(),
+                self.ema_slow[first:].tolist(), self.supertrend[first:].tolist(), self.codes[first:].tolist()))]
+        return self._updates
+
+
+# -------------------- Stages --------------------
+# Each returns the number of items it processed.
+
+def _renko(d):
+    return renko_bricks(d.close, BRICK_SIZE)[4].size
+
+
+def _indicators(d):
+    indicator_arrays(d.highs, d.lows, d.closes, **PARAMS)
+    return d.bricks
+
+
+def _streaming_indicators(d):
+    engine = StreamingIndicators(**PARAMS)
+    for h, l, c in zip(d.highs.tolist(), d.lows.tolist(), d.closes.tolist()):
+        engine.update(h, l, c)
+    return d.bricks
+
+
+def _signals(d):
+    compute_signals(d.opens, d.highs, d.lows, d.closes, d.ema_fast, d.ema_slow, d.supertrend,
+                    st_bar=ST_CURR, start=SIGNAL_START)
+    return d.bricks
+
+
+def _backtest(d):
+    backtest_arrays(d.brick_dates, d.opens, d.highs, d.lows, d.closes, d.supertrend, d.codes)
+    return d.bricks
+
+
+WS_MESSAGES = 100_000
+
+
+def _ws_json(d):
+    from broadcast import JsonFormat
+    return len(JsonFormat().encode(d.updates(WS_MESSAGES)))
+
+
+def _ws_binary(d):
+    from protocol import BinaryFormat, snapshot_frame
+    updates = d.updates(WS_MESSAGES)
+    time_ms = d.brick_dates / 1e6
+    BinaryFormat(time_ms, None).encode(updates)
+    snapshot_frame(time_ms, d.closes, d.ema_fast, d.ema_slow, d.supertrend, d.codes, d.bricks)
+    return len(updates)
+
+
+CHART_FRAMES = 100
+
+
+def _chart_render(d):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from live_plot import LiveChart
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    chart = LiveChart(ax, [('Renko Close', d.closes, {'color': 'blue'}),
+                           ('EMA fast', d.ema_fast, {'color': 'orange'}),
+                           ('EMA slow', d.ema_slow, {'color': 'purple'})],
+                      close=d.closes, codes=d.codes, title="Benchmark")
+    first = max(1, d.bricks - CHART_FRAMES)
+    for n in range(first, d.bricks + 1):
+        chart.draw(n)
+    plt.close(fig)
+    return d.bricks + 1 - first
+
+
+def _pipeline(d):
+    index, opens, highs, lows, closes = renko_bricks(d.close, BRICK_SIZE)
+    values, _ = indicator_arrays(highs, lows, closes, **PARAMS)
+    codes = compute_signals(opens, highs, lows, closes, values['ema_fast'], values['ema_slow'],
+                            values['supertrend'], st_bar=ST_CURR, start=SIGNAL_START)
+    backtest_arrays(d.dates[index], opens, highs, lows, closes, values['supertrend'], codes)
+    return d.rows
+
+
+# name -> (function, largest input size it runs at)
+STAGES = {
+    'renko': (_renko, None),
+    'indicators': (_indicators, None),
+    'streaming_indicators': (_streaming_indicators, 1_000_000),
+    'signals': (_signals, None),
+    'backtest': (_backtest, None),
+    'ws_json': (_ws_json, None),
+    'ws_binary': (_ws_binary, None),
+    'chart_render': (_chart_render, None),
+    'pipeline': (_pipeline, None),
+}
+
+
+def _measure(fn, inputs, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        items = fn(inputs)
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(inputs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak, items
+
+
+def run(sizes=DEFAULT_SIZES, stages=None, repeat=3, log=None):
+    """Run ``stages`` (all by default) at each size; returns the result document."""
+    stages = list(STAGES) if stages is None else stages
+    results = []
+    for rows in sizes:
+        inputs = _Inputs(rows)
+        for name in stages:
+            fn, max_rows = STAGES[name]
+            if max_rows is not None and rows > max_rows:
+                continue
+            seconds, peak, items = _measure(fn, inputs, repeat if rows < 10_000_000 else 1)
+            result = {'stage': name, 'rows': rows, 'bricks': inputs.bricks, 'items': items,
+                      'seconds': seconds, 'peak_mb': peak / 2**20,
+                      'rows_per_s': rows / seconds if seconds else None,
+                      'items_per_s': items / seconds if seconds else None}
+            results.append(result)
+            if log is not None:
+                log(result)
+        del inputs
+    return {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'processor': platform.processor(), 'cpus': os.cpu_count(),
+            'repeat': repeat, 'brick_size': BRICK_SIZE, 'params': PARAMS,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.5, memory_threshold=0.25):
+    """Regressions of ``current`` against ``baseline`` as a list of readable strings."""
+    base = {(r['stage'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        b = base.get((r['stage'], r['rows']))
+        if b is None:
+            continue
+        ratio = max(r['seconds'], MIN_SECONDS) / max(b['seconds'], MIN_SECONDS)
+        if ratio > 1 + threshold:
+            regressions.append(f"{r['stage']} @ {r['rows']:,} rows: {r['seconds']:.4f} s vs "
+                               f"{b['seconds']:.4f} s baseline ({ratio:.2f}x)")
+        # Ignore sub-megabyte wobble in the allocator
+        if r['peak_mb'] > b['peak_mb'] * (1 + memory_threshold) and r['peak_mb'] - b['peak_mb'] > 1:
+            regressions.append(f"{r['stage']} @ {r['rows']:,} rows: peak {r['peak_mb']:.1f} MB vs "
+                               f"{b['peak_mb']:.1f} MB baseline")
+    return regressions
+
+
+def _print(r):
+    rate = f"{r['items_per_s']:,.0f}" if r['items_per_s'] else '-'
+    print(f"{r['stage']:>21} {r['rows']:>11,} {r['items']:>10,} {r['seconds']:>10.4f} "
+          f"{r['peak_mb']:>9.1f} {rate:>14}", flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage and check for regressions")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        type=lambda s: [int(float(x)) for x in s.split(',')])
+    parser.add_argument('--stages', type=lambda s: s.split(','), help=f"subset of {','.join(STAGES)}")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.5, help="allowed slowdown, 0.5 = 50%%")
+    parser.add_argument('--memory-threshold', type=float, default=0.25)
+    args = parser.parse_args()
+
+    unknown = set(args.stages or ()) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    print(f"{'stage':>21} {'rows':>11} {'items':>10} {'seconds':>10} {'peak MB':>9} {'items/s':>14}")
+    results = run(args.sizes, args.stages, args.repeat, log=_print)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=1)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as fh:
+            json.dump(results, fh, indent=1)
+        print(f"baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.threshold, args.memory_threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}")
+    else:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
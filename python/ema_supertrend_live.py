@@ -1,102 +1,41 @@
-import pandas as pd
-import pandas_ta as ta
 import matplotlib.pyplot as plt
+from renko_cache import load_renko
+from signals import renko_signals, signal_labels
+from live_plot import LiveChart
 import time
 import os
 
-# -------------------- Load Historical Data --------------------
-df = pd.read_csv("EURUSD_1min.csv", parse_dates=['Date'])
-
-# -------------------- Renko Generation --------------------
-def renko_df(df, brick_size):
-    df_renko = pd.DataFrame(columns=['Date','Open','High','Low','Close'])
-    last_close = df['Close'].iloc[0]
-    open_price = last_close
-    for i,row in df.iterrows():
-        price = row['Close']
-        while abs(price - last_close) >= brick_size:
-            direction = 1 if price > last_close else -1
-            close_price = last_close + direction * brick_size
-            high = max(last_close, close_price)
-            low = min(last_close, close_price)
-            df_renko = pd.concat([df_renko, pd.DataFrame({'Date':[row['Date']],
-                                                           'Open':[open_price],
-                                                           'High':[high],
-                                                           'Low':[low],
-                                                           'Close':[close_price]})], ignore_index=True)
-            last_close = close_price
-            open_price = last_close
-    return df_renko
-
+# -------------------- Renko + Indicators (cached) --------------------
+# Short EMAs for visible signals; bricks and indicators are read from the on-disk cache
 brick_size = 0.0010
-renko = renko_df(df, brick_size)
-
-# -------------------- Indicators --------------------
-renko['High'] = pd.to_numeric(renko['High'])
-renko['Low'] = pd.to_numeric(renko['Low'])
-renko['Close'] = pd.to_numeric(renko['Close'])
-
-# Short EMAs for testing
-renko['EMA20'] = ta.ema(renko['Close'], length=20)
-renko['EMA50'] = ta.ema(renko['Close'], length=50)
-
-# Supertrend
-st = ta.supertrend(high=renko['High'], low=renko['Low'], close=renko['Close'], length=2, multiplier=30)
-if st is not None:
-    st_col = [col for col in st.columns if "SUPERT" in col][0]
-    renko['ST'] = st[st_col]
-else:
-    renko['ST'] = pd.Series([None]*len(renko))
-    print("Supertrend calculation failed. Using empty ST column.")
+renko = load_renko("EURUSD_1min.csv", brick_size, fast_length=20, slow_length=50, st_length=2, st_multiplier=30)
 
 # -------------------- Signals --------------------
-signals = []
-for i in range(1, len(renko)):
-    if pd.isna(renko['ST'].iloc[i-1]) or pd.isna(renko['EMA20'].iloc[i-1]) or pd.isna(renko['EMA50'].iloc[i-1]):
-        signals.append('HOLD')
-        continue
-
-    buy = (renko['ST'].iloc[i-1] < renko['Close'].iloc[i-1]) and \
-          (renko['EMA20'].iloc[i-1] > renko['EMA50'].iloc[i-1]) and \
-          (renko['Low'].iloc[i-1] < renko['EMA50'].iloc[i-1]) and \
-          (renko['Close'].iloc[i] > renko['Open'].iloc[i])
-    
-    sell = (renko['ST'].iloc[i-1] > renko['Close'].iloc[i-1]) and \
-           (renko['EMA20'].iloc[i-1] < renko['EMA50'].iloc[i-1]) and \
-           (renko['High'].iloc[i-1] > renko['EMA50'].iloc[i-1]) and \
-           (renko['Close'].iloc[i] < renko['Open'].iloc[i])
-    
-    if buy:
-        signals.append('BUY')
-    elif sell:
-        signals.append('SELL')
-    else:
-        signals.append('HOLD')
-
-renko['Signal'] = ['HOLD'] + signals
+codes = renko_signals(renko, 'EMA20', 'EMA50')
+renko['Signal'] = signal_labels(codes)
 
 # -------------------- Pseudo Live Plotting --------------------
+# LIVE_PLOT_MODE=redraw replots the whole history every frame (the old behaviour)
+blit = os.environ.get("LIVE_PLOT_MODE", "blit") != "redraw"
+closes = renko['Close'].to_numpy()
+
 plt.ion()  # interactive mode
 fig, ax = plt.subplots(figsize=(12,6))
+chart = LiveChart(
+    ax,
+    [('Renko Close', closes, {'color': 'blue'}),
+     ('EMA20', renko['EMA20'].to_numpy(), {'color': 'orange'}),
+     ('EMA50', renko['EMA50'].to_numpy(), {'color': 'purple'})],
+    close=closes, codes=codes, window=500, max_points=1000, blit=blit,
+    title="Renko Chart with EMA & Supertrend Signals (Pseudo Live)",
+)
+plt.show(block=False)
 
 for i in range(len(renko)):
-    ax.clear()
-    ax.plot(renko['Close'][:i+1], color='blue', label='Renko Close')
-    ax.plot(renko['EMA20'][:i+1], color='orange', label='EMA20')
-    ax.plot(renko['EMA50'][:i+1], color='purple', label='EMA50')
-    
-    # Plot BUY/SELL signals up to current bar
-    buy_idx = renko.index[:i+1][renko['Signal'][:i+1]=='BUY']
-    sell_idx = renko.index[:i+1][renko['Signal'][:i+1]=='SELL']
-    ax.scatter(buy_idx, renko['Close'][buy_idx], marker='^', color='g', s=100, label='BUY Signal')
-    ax.scatter(sell_idx, renko['Close'][sell_idx], marker='v', color='r', s=100, label='SELL Signal')
-    
-    ax.set_title("Renko Chart with EMA & Supertrend Signals (Pseudo Live)")
-    ax.set_xlabel("Bars")
-    ax.set_ylabel("Price")
-    ax.legend()
-    plt.pause(0.05)  # speed of the pseudo live update
+    chart.draw(i + 1, f"{i + 1}/{len(renko)}")
+    chart.pause(0.05)  # speed of the pseudo live update
 
+chart.freeze()
 plt.ioff()
 plt.savefig("renko_signals_live.png")
 plt.show()
@@ -1,41 +1,22 @@
 import pandas as pd
-import pandas_ta as ta
 import matplotlib
 matplotlib.use('TkAgg')  # GUI backend for live chart
 import matplotlib.pyplot as plt
 import time
 import os
+from renko_cache import open_cached
+from indicators import StreamingIndicators
+from live_plot import LiveChart
+from ringbuffer import RingBuffer
+from journal import Journal
+from signals import BUY, SELL
 
-# -------------------- Load Historical Data --------------------
-df = pd.read_csv("EURUSD_1min.csv", parse_dates=['Date'])
-
-# -------------------- Renko Function --------------------
-def renko_df(df, brick_size):
-    df_renko = pd.DataFrame(columns=['Date', 'Open', 'High', 'Low', 'Close'])
-    last_close = df['Close'].iloc[0]
-    open_price = last_close
-    for i, row in df.iterrows():
-        price = row['Close']
-        while abs(price - last_close) >= brick_size:
-            direction = 1 if price > last_close else -1
-            close_price = last_close + direction * brick_size
-            high = max(last_close, close_price)
-            low = min(last_close, close_price)
-            new_row = pd.DataFrame({
-                'Date': [row['Date']],
-                'Open': [open_price],
-                'High': [high],
-                'Low': [low],
-                'Close': [close_price]
-            })
-            df_renko = pd.concat([df_renko, new_row], ignore_index=True)
-            last_close = close_price
-            open_price = last_close
-    return df_renko
-
-# -------------------- Generate Renko --------------------
+# -------------------- Renko source (cached) --------------------
+# Memory-mapped bricks from the on-disk cache: the replay source is never copied onto the heap
 brick_size = 0.001
-renko_full = renko_df(df, brick_size)
+source = open_cached("EURUSD_1min.csv", brick_size, fast_length=100, slow_length=300, st_length=2, st_multiplier=30)
+dates, opens, highs, lows, closes = (source[name] for name in ('Date', 'Open', 'High', 'Low', 'Close'))
+total = len(closes)
 
 if not os.path.exists("charts"):
     os.makedirs("charts")
@@ -48,47 +29,75 @@ fig, ax = plt.subplots(figsize=(12, 6))
 plt.show(block=False)
 plt.pause(2)  # allow GUI window to appear
 
-for i in range(300, len(renko_full)):
-    renko = renko_full.iloc[:i].copy()
-    renko['EMA100'] = ta.ema(renko['Close'], length=100)
-    renko['EMA300'] = ta.ema(renko['Close'], length=300)
+# Indicators are updated one brick at a time; the last LIVE_CAPACITY bricks with
+# their indicators and signals live in a fixed-size ring, so memory stays flat
+engine = StreamingIndicators(fast_length=100, slow_length=300, st_length=2, st_multiplier=30)
+live = RingBuffer(int(os.environ.get("LIVE_CAPACITY", "5000")), [
+    ('Date', 'i8'), ('Open', 'f8'), ('High', 'f8'), ('Low', 'f8'), ('Close', 'f8'),
+    ('EMA100', 'f8'), ('EMA300', 'f8'), ('ST', 'f8'), ('Signal', 'i1'),
+])
+col = {name: live.column(name) for name in live.names}
 
-    st = ta.supertrend(renko['High'], renko['Low'], renko['Close'], length=2, multiplier=30)
-    if st is not None and not st.empty:
-        st_col = [col for col in st.columns if "SUPERT" in col][0]
-        renko['ST'] = st[st_col]
-    else:
-        renko['ST'] = pd.Series([None] * len(renko))
+# JOURNAL=path records every brick, its indicators and signal for later audit (python journal.py path)
+journal = Journal(os.environ["JOURNAL"], meta={"source": "EURUSD_1min.csv", "brick_size": brick_size}) \
+    if os.environ.get("JOURNAL") else None
 
-    # Signal generation
-    if i > 301 and not pd.isna(renko['ST'].iloc[-2]):
-        buy = (renko['ST'].iloc[-2] < renko['Close'].iloc[-2]) and \
-              (renko['EMA100'].iloc[-2] > renko['EMA300'].iloc[-2]) and \
-              (renko['Low'].iloc[-2] < renko['EMA300'].iloc[-2]) and \
-              (renko['Close'].iloc[-1] > renko['Open'].iloc[-1])
-        sell = (renko['ST'].iloc[-2] > renko['Close'].iloc[-2]) and \
-               (renko['EMA100'].iloc[-2] < renko['EMA300'].iloc[-2]) and \
-               (renko['High'].iloc[-2] > renko['EMA300'].iloc[-2]) and \
-               (renko['Close'].iloc[-1] < renko['Open'].iloc[-1])
+def feed(j):
+    """Stream brick ``j`` through the indicators and signal rules into the ring."""
+    values = engine.update(highs[j], lows[j], closes[j])
+    code = 0
+    if j > 300 and col['ST'][j-1] == col['ST'][j-1]:  # previous Supertrend defined
+        buy = (col['ST'][j-1] < col['Close'][j-1]) and \
+              (col['EMA100'][j-1] > col['EMA300'][j-1]) and \
+              (col['Low'][j-1] < col['EMA300'][j-1]) and \
+              (closes[j] > opens[j])
+        sell = (col['ST'][j-1] > col['Close'][j-1]) and \
+               (col['EMA100'][j-1] < col['EMA300'][j-1]) and \
+               (col['High'][j-1] > col['EMA300'][j-1]) and \
+               (closes[j] < opens[j])
         if buy:
-            print(f"🟢 BUY @ {renko['Close'].iloc[-1]:.5f} | {renko['Date'].iloc[-1]}")
+            code = BUY
+            print(f"🟢 BUY @ {closes[j]:.5f} | {pd.Timestamp(int(dates[j]))}")
         elif sell:
-            print(f"🔴 SELL @ {renko['Close'].iloc[-1]:.5f} | {renko['Date'].iloc[-1]}")
+            code = SELL
+            print(f"🔴 SELL @ {closes[j]:.5f} | {pd.Timestamp(int(dates[j]))}")
+    live.append(dates[j], opens[j], highs[j], lows[j], closes[j],
+                values.ema_fast, values.ema_slow, values.supertrend, code)
+    if journal is not None:
+        journal.append(bar=j, date=dates[j], open=opens[j], high=highs[j], low=lows[j], close=closes[j],
+                       ema_fast=values.ema_fast, ema_slow=values.ema_slow, supertrend=values.supertrend,
+                       direction=values.direction, signal=code)
+        if journal.due():
+            journal.sync()
+
+# LIVE_PLOT_MODE=redraw replots the retained history every frame (the old behaviour)
+chart = LiveChart(
+    ax,
+    [('Renko Close', col['Close'], {'color': 'blue'}),
+     ('EMA100', col['EMA100'], {'color': 'orange'}),
+     ('EMA300', col['EMA300'], {'color': 'red'}),
+     ('Supertrend', col['ST'], {'color': 'green', 'linestyle': '--', 'alpha': 0.6})],
+    close=col['Close'], codes=col['Signal'], window=500, max_points=1000,
+    blit=os.environ.get("LIVE_PLOT_MODE", "blit") != "redraw",
+    title="📈 Live EMA + Supertrend Simulation",
+)
+
+for j in range(min(299, total)):
+    feed(j)
+
+for i in range(300, total + 1):
+    feed(i - 1)  # the visible window now covers bricks up to i-1
 
-    # --- Plot update ---
-    ax.clear()
-    ax.plot(renko['Close'], label='Renko Close', color='blue')
-    ax.plot(renko['EMA100'], label='EMA100', color='orange')
-    ax.plot(renko['EMA300'], label='EMA300', color='red')
-    if 'ST' in renko.columns:
-        ax.plot(renko['ST'], label='Supertrend', color='green', linestyle='--', alpha=0.6)
-    ax.set_title(f"📈 Live EMA + Supertrend Simulation ({i}/{len(renko_full)})")
-    ax.legend(loc='upper left')
-    plt.pause(0.5)  # <— slower so it updates visibly
+    # --- Plot update: only the new brick's artists change ---
+    chart.draw(i, f"({i}/{total})")
+    chart.pause(0.5)  # <— slower so it updates visibly
 
 print("✅ Live Renko playback complete!")
+if journal is not None:
+    journal.close()
 
 # keep window open after loop
+chart.freeze()
 plt.ioff()
 plt.show(block=True)
 input("Press Enter to close the chart...")
@@ -0,0 +1,309 @@
+"""Event-driven paper trading against a local stand-in broker.
+
+``ExecutionEngine`` turns the bar/signal stream into orders the way
+``cBot/EMA_Reversal_Supertrend.cs`` does - a market order with a stop-loss
+per BUY/SELL signal, and ``ClosePosition`` for every open position when
+Supertrend flips against it (the same sign convention as ``backtest.py``) -
+and pushes them through an asyncio queue drained by concurrent sender
+tasks.  ``SimulatedBroker`` stands in for cTrader:
+
+* each request and response leg sleeps a sampled network latency;
+* market orders fill at the price current when the request reaches the
+  broker, plus random adverse slippage;
+* stop-losses live broker-side and trigger on the bar's high/low without
+  any latency, filling at the stop price minus slippage.
+
+Per order the engine records queue wait, broker round trip and the total
+signal-to-fill time in ``metrics`` histograms.
+
+Stress test::
+
+    python execution.py [--bars 20000] [--latency-ms 20] [--senders 512]
+"""
+import asyncio
+import collections
+import itertools
+import random
+import time
+
+from metrics import Histogram, record
+from signals import BUY, SELL
+
+MARKET = 'market'
+CLOSE = 'close'
+
+STOP = 'stop'
+FLIP = 'flip'
+
+Fill = collections.namedtuple('Fill', ['order_id', 'position_id', 'symbol', 'side', 'volume', 'price', 'reason'])
+
+
+class Order:
+    __slots__ = ('id', 'kind', 'symbol', 'side', 'volume', 'stop_loss_pips', 'label', 'position_id',
+                 'created_ns', 'submitted_ns', 'filled_ns', 'fill')
+
+    def __init__(self, id, kind, symbol, side, volume=0, stop_loss_pips=None, label='', position_id=None):
+        self.id = id
+        self.kind = kind
+        self.symbol = symbol
+        self.side = side
+        self.volume = volume
+        self.stop_loss_pips = stop_loss_pips
+        self.label = label
+        self.position_id = position_id
+        self.created_ns = time.perf_counter_ns()
+        self.submitted_ns = self.filled_ns = None
+        self.fill = None
+
+
+class Position:
+    __slots__ = ('id', 'symbol', 'side', 'volume', 'entry_price', 'stop_price', 'label', 'closing')
+
+    def __init__(self, id, symbol, side, volume, entry_price, stop_price, label):
+        self.id = id
+        self.symbol = symbol
+        self.side = side
+        self.volume = volume
+        self.entry_price = entry_price
+        self.stop_price = stop_price
+        self.label = label
+        self.closing = False
+
+
+class SimulatedBroker:
+    """Local broker with latency, slippage and server-side stop-losses.
+
+    ``latency_ms`` is the mean one-way network delay (each leg is sampled
+    from a normal with ``jitter_ms`` standard deviation, floored at 0).
+    ``on_stop(position, fill)`` is called when a stop-loss closes a position.
+    """
+
+    def __init__(self, latency_ms=50.0, jitter_ms=10.0, slippage_pips=0.2, pip_size=0.0001,
+                 seed=0, on_stop=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slippage_pips = slippage_pips
+        self.pip_size = pip_size
+        self.on_stop = on_stop
+        self.prices = {}
+        self.positions = {}
+        self._by_symbol = collections.defaultdict(dict)
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    async def _leg(self):
+        delay = self._rng.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms else self.latency_ms
+        await asyncio.sleep(max(delay, 0.0) / 1e3)
+
+    def _slipped(self, price, side):
+        # Always against the trader: buys fill higher, sells lower
+        slip = abs(self._rng.gauss(0.0, self.slippage_pips)) * self.pip_size if self.slippage_pips else 0.0
+        return price + side * slip
+
+    def on_price(self, symbol, price, high=None, low=None):
+        """New market price; triggers stops inside ``[low, high]``."""
+        self.prices[symbol] = price
+        high = price if high is None else high
+        low = price if low is None else low
+        open_positions = self._by_symbol[symbol]
+        if not open_positions:
+            return
+        hit = [p for p in open_positions.values()
+               if p.stop_price is not None and (low <= p.stop_price if p.side == BUY else high >= p.stop_price)]
+        for position in hit:
+            fill = self._close(position, self._slipped(position.stop_price, -position.side), STOP, order_id=None)
+            if self.on_stop is not None:
+                self.on_stop(position, fill)
+
+    def _close(self, position, price, reason, order_id):
+        del self.positions[position.id]
+        del self._by_symbol[position.symbol][position.id]
+        return Fill(order_id, position.id, position.symbol, -position.side, position.volume, price, reason)
+
+    async def execute_market_order(self, order):
+        """Open a position for ``order``; returns ``(fill, position)``."""
+        await self._leg()
+        price = self._slipped(self.prices[order.symbol], order.side)
+        stop = None
+        if order.stop_loss_pips:
+            stop = price - order.side * order.stop_loss_pips * self.pip_size
+        position = Position(next(self._ids), order.symbol, order.side, order.volume, price, stop, order.label)
+        self.positions[position.id] = position
+        self._by_symbol[order.symbol][position.id] = position
+        fill = Fill(order.id, position.id, order.symbol, order.side, order.volume, price, MARKET)
+        await self._leg()
+        return fill, position
+
+    async def close_position(self, order):
+        """Close ``order.position_id``; ``None`` if it was already closed (e.g. stopped out)."""
+        await self._leg()
+        position = self.positions.get(order.position_id)
+        fill = None
+        if position is not None:
+            fill = self._close(position, self._slipped(self.prices[position.symbol], -position.side), FLIP, order.id)
+        await self._leg()
+        return fill
+
+
+class ExecutionEngine:
+    """Async order queue between the signal stream and a broker.
+
+    Call ``on_bar`` once per closed brick.  ``senders`` tasks send queued
+    orders concurrently, so slow broker round trips overlap instead of
+    serialising.
+    """
+
+    def __init__(self, broker, volume=10000, stop_loss_pips=5.0, label='EMA_Reversal', senders=64,
+                 max_trades=10_000):
+        self.broker = broker
+        broker.on_stop = self._on_stop
+        self.volume = volume
+        self.stop_loss_pips = stop_loss_pips
+        self.label = label
+        self.senders = senders
+        self.positions = {}
+        self.trades = collections.deque(maxlen=max_trades)
+        self.realised_pnl = 0.0
+        self.latency = {name: Histogram() for name in ('queue', 'broker', 'signal_to_fill')}
+        self.counts = {'orders': 0, 'filled': 0, 'rejected': 0, 'stopped': 0, 'flipped': 0}
+        self._queue = None
+        self._tasks = []
+        self._ids = itertools.count(1)
+
+    def start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._sender()) for _ in range(self.senders)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def join(self):
+        """Wait until every submitted order has been answered by the broker."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def submit(self, kind, symbol, side, position_id=None):
+        self.start()
+        order = Order(next(self._ids), kind, symbol, side, self.volume,
+                      self.stop_loss_pips if kind == MARKET else None, self.label, position_id)
+        self.counts['orders'] += 1
+        self._queue.put_nowait(order)
+        return order
+
+    def on_bar(self, symbol, close, high, low, supertrend, signal):
+        """Update the broker price, close flipped positions and act on ``signal``."""
+        close, high, low, supertrend = float(close), float(high), float(low), float(supertrend)
+        self.broker.on_price(symbol, close, high, low)
+        if supertrend == supertrend:  # not NaN
+            for position in list(self.positions.values()):
+                if position.symbol != symbol or position.closing or position.label != self.label:
+                    continue
+                if (supertrend > close) if position.side == BUY else (supertrend < close):
+                    position.closing = True
+                    self.submit(CLOSE, symbol, -position.side, position.id)
+        if signal == BUY or signal == SELL:
+            self.submit(MARKET, symbol, int(signal))
+
+    async def _sender(self):
+        while True:
+            order = await self._queue.get()
+            try:
+                order.submitted_ns = time.perf_counter_ns()
+                if order.kind == MARKET:
+                    order.fill, position = await self.broker.execute_market_order(order)
+                    # A stop may already have closed it while the response was in flight
+                    if position.id in self.broker.positions:
+                        self.positions[position.id] = position
+                else:
+                    order.fill = await self.broker.close_position(order)
+                    if order.fill is not None:
+                        self._closed(self.positions.pop(order.position_id, None), order.fill)
+                        self.counts['flipped'] += 1
+                order.filled_ns = time.perf_counter_ns()
+                self._record(order)
+            finally:
+                self._queue.task_done()
+
+    def _record(self, order):
+        if order.fill is None:
+            self.counts['rejected'] += 1
+            return
+        self.counts['filled'] += 1
+        for name, ns in (('queue', order.submitted_ns - order.created_ns),
+                         ('broker', order.filled_ns - order.submitted_ns),
+                         ('signal_to_fill', order.filled_ns - order.created_ns)):
+            self.latency[name].record(ns)
+            record(f'order_{name}', ns)
+
+    def _on_stop(self, position, fill):
+        self.counts['stopped'] += 1
+        self._closed(self.positions.pop(position.id, position), fill)
+
+    def _closed(self, position, fill):
+        if position is None:
+            return
+        pnl = (fill.price - position.entry_price) * position.side * position.volume
+        self.realised_pnl += pnl
+        self.trades.append({'position_id': position.id, 'symbol': position.symbol, 'side': position.side,
+                            'entry_price': position.entry_price, 'exit_price': fill.price,
+                            'exit_reason': fill.reason, 'pnl': pnl})
+
+    def stats(self):
+        latency = {}
+        for name, hist in self.latency.items():
+            if not hist.calls:
+                latency[name] = {'count': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+                continue
+            p50, p99 = hist.quantiles([0.5, 0.99])
+            latency[name] = {'count': hist.calls, 'p50_ms': p50 / 1e6, 'p99_ms': p99 / 1e6,
+                             'max_ms': hist.max_ns / 1e6}
+        return dict(self.counts, open_positions=len(self.positions), realised_pnl=self.realised_pnl,
+                    queued=self._queue.qsize() if self._queue is not None else 0, latency=latency)
+
+
+async def _stress(bars, latency_ms, senders, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 2e-4, bars))
+    high = close + np.abs(rng.normal(0, 1e-4, bars))
+    low = close - np.abs(rng.normal(0, 1e-4, bars))
+    supertrend = close + rng.choice([-1, 1], bars) * 5e-4
+    signal = rng.choice([BUY, SELL], bars)
+
+    engine = ExecutionEngine(SimulatedBroker(latency_ms=latency_ms / 2, jitter_ms=latency_ms / 10, seed=seed),
+                             senders=senders)
+    t0 = time.perf_counter()
+    for k in range(bars):
+        engine.on_bar('EURUSD', close[k], high[k], low[k], supertrend[k], signal[k])
+        if k % 100 == 0:
+            await asyncio.sleep(0)  # let senders run while bars keep coming
+    await engine.join()
+    elapsed = time.perf_counter() - t0
+    await engine.stop()
+    stats = engine.stats()
+    stats['orders_per_s'] = stats['filled'] / elapsed
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Order throughput against the simulated broker")
+    parser.add_argument('--bars', type=int, default=20_000)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="mean round trip")
+    parser.add_argument('--senders', type=int, default=512)
+    args = parser.parse_args()
+
+    s = asyncio.run(_stress(args.bars, args.latency_ms, args.senders))
+    print(f"orders {s['orders']}  filled {s['filled']}  rejected {s['rejected']}  "
+          f"stopped {s['stopped']}  flipped {s['flipped']}  open {s['open_positions']}")
+    print(f"throughput {s['orders_per_s']:.0f} orders/s")
+    for name, h in s['latency'].items():
+        print(f"{name:>15}: p50 {h['p50_ms']:8.3f} ms  p99 {h['p99_ms']:8.3f} ms  max {h['max_ms']:8.3f} ms")
@@ -1,14 +0,0 @@
-import pandas as pd
-import numpy as np
-
-rows = []
-price = 1.1000
-for i in range(100):
-    high = price + np.random.uniform(0,0.0005)
-    low = price - np.random.uniform(0,0.0005)
-    close = low + np.random.uniform(0, high-low)
-    rows.append([f"2025-10-07 00:{i:02d}:00", price, high, low, close, np.random.randint(100,200)])
-    price = close
-
-df = pd.DataFrame(rows, columns=['Date','Open','High','Low','Close','Volume'])
-df.to_csv("EURUSD_1min.csv", index=False)
@@ -0,0 +1,250 @@
+"""Streaming EMA / ATR / Supertrend that update in O(1) per Renko brick.
+
+Each class mirrors the ``pandas_ta`` batch calculation step for step (SMA
+seeded EMA and RMA, true range with a missing previous close on the first
+bar, Supertrend band ratcheting) so feeding a series one brick at a time
+yields the same values as ``ta.ema`` / ``ta.supertrend`` on the whole
+series, to floating-point tolerance.
+
+``ema`` / ``atr`` / ``supertrend`` are the whole-array equivalents for batch
+work (sweeps, caches) that should not pay for a ``pandas_ta`` import.
+"""
+from collections import namedtuple
+import math
+
+import numpy as np
+import pandas as pd
+
+from metrics import stage
+
+IndicatorValues = namedtuple('IndicatorValues', ['ema_fast', 'ema_slow', 'supertrend', 'direction'])
+
+
+def _ewm_alpha_from_span(span):
+    # Same derivation pandas uses for ewm(span=...)
+    com = (span - 1) / 2.0
+    return 1.0 / (1.0 + com)
+
+
+def _ewm_alpha_from_alpha(alpha):
+    # pandas converts alpha to a centre of mass and back again
+    com = (1.0 - alpha) / alpha
+    return 1.0 / (1.0 + com)
+
+
+class _SeededEWM:
+    """EWM (adjust=False) seeded with the SMA of the first ``length`` values."""
+
+    def __init__(self, length, alpha):
+        self.length = length
+        self.alpha = alpha
+        self.old_wt = 1.0 - alpha
+        self._warmup = []
+        self.value = math.nan
+
+    def update(self, x):
+        if self._warmup is not None:
+            self._warmup.append(x)
+            if len(self._warmup) < self.length:
+                return math.nan
+            self.value = float(np.sum(np.asarray(self._warmup)) / self.length)
+            self._warmup = None
+            return self.value
+
+        if x != self.value:
+            self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+        return self.value
+
+
+class StreamingEMA(_SeededEWM):
+    """``ta.ema(close, length)`` one value at a time."""
+
+    def __init__(self, length):
+        super().__init__(length, _ewm_alpha_from_span(length))
+
+
+class StreamingATR(_SeededEWM):
+    """``ta.atr(high, low, close, length)`` (RMA smoothing) one bar at a time."""
+
+    def __init__(self, length):
+        super().__init__(length, _ewm_alpha_from_alpha(1.0 / length))
+        self.prev_close = None
+
+    def update(self, high, low, close):
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(self.prev_close - low))
+        self.prev_close = close
+        return super().update(tr)
+
+
+class StreamingSupertrend:
+    """``ta.supertrend(high, low, close, length, multiplier)`` one bar at a time.
+
+    ``update`` returns ``(trend, direction)``; ``trend`` is the SUPERT column
+    and ``direction`` the SUPERTd column (NaN during warm-up).
+    """
+
+    def __init__(self, length=2, multiplier=30.0):
+        self.length = length
+        self.multiplier = float(multiplier)
+        self.atr = StreamingATR(length)
+        self.count = 0
+        self.direction = 1
+        self.upper = math.nan
+        self.lower = math.nan
+
+    def update(self, high, low, close):
+        matr = self.multiplier * self.atr.update(high, low, close)
+        hl2 = 0.5 * (high + low)
+        lower = hl2 - matr
+        upper = hl2 + matr
+
+        if self.count > 0:
+            if close > self.upper:
+                self.direction = 1
+            elif close < self.lower:
+                self.direction = -1
+            else:
+                if self.direction > 0 and lower < self.lower:
+                    lower = self.lower
+                if self.direction < 0 and upper > self.upper:
+                    upper = self.upper
+        self.count += 1
+        self.upper = upper
+        self.lower = lower
+
+        if self.count == 1:
+            trend = math.nan
+        else:
+            trend = lower if self.direction > 0 else upper
+        direction = math.nan if self.count <= self.length else float(self.direction)
+        return trend, direction
+
+
+class StreamingIndicators:
+    """Fast/slow EMA plus Supertrend on a stream of Renko bricks."""
+
+    def __init__(self, fast_length=100, slow_length=300, st_length=2, st_multiplier=30):
+        self.fast = StreamingEMA(fast_length)
+        self.slow = StreamingEMA(slow_length)
+        self.supertrend = StreamingSupertrend(st_length, st_multiplier)
+        self.count = 0
+
+    def update(self, high, low, close):
+        """Consume one brick and return its ``IndicatorValues``."""
+        high = float(high)
+        low = float(low)
+        close = float(close)
+        trend, direction = self.supertrend.update(high, low, close)
+        self.count += 1
+        return IndicatorValues(self.fast.update(close), self.slow.update(close), trend, direction)
+
+
+def _seeded(values, length):
+    seeded = values.copy()
+    seeded[length - 1] = values[:length].mean()
+    seeded[:length - 1] = np.nan
+    return seeded
+
+
+def ema(close, length):
+    """Whole-array ``ta.ema(close, length)`` (all NaN if the input is too short)."""
+    close = np.asarray(close, dtype=np.float64)
+    if close.size < length:
+        return np.full(close.size, np.nan)
+    return pd.Series(_seeded(close, length)).ewm(span=length, adjust=False).mean().to_numpy()
+
+
+def atr(high, low, close, length):
+    """Whole-array ``ta.atr(high, low, close, length)`` with RMA smoothing."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    if close.size < length:
+        return np.full(close.size, np.nan)
+    tr = high - low
+    prev_close = close[:-1]
+    tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev_close), np.abs(prev_close - low[1:])))
+    return pd.Series(_seeded(tr, length)).ewm(alpha=1.0 / length, adjust=False).mean().to_numpy()
+
+
+def _supertrend_bands(high, low, close, length, multiplier):
+    # Returns trend, direction and the final (ratcheted) bands/direction
+    n = close.size
+    trend = np.full(n, np.nan)
+    direction = np.full(n, np.nan)
+    if n < length:
+        return trend, direction, math.nan, math.nan, 1
+
+    matr = float(multiplier) * atr(high, low, close, length)
+    hl2 = 0.5 * (high + low)
+    lower = (hl2 - matr).tolist()
+    upper = (hl2 + matr).tolist()
+    closes = close.tolist()
+    trend_out = [math.nan] * n
+    dir_out = [1] * n
+    d = 1
+    for i in range(1, n):
+        c = closes[i]
+        if c > upper[i - 1]:
+            d = 1
+        elif c < lower[i - 1]:
+            d = -1
+        else:
+            if d > 0 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if d < 0 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+        dir_out[i] = d
+        trend_out[i] = lower[i] if d > 0 else upper[i]
+
+    trend[:] = trend_out
+    direction[:] = dir_out
+    direction[:length] = np.nan
+    return trend, direction, upper[-1], lower[-1], d
+
+
+def supertrend(high, low, close, length=2, multiplier=30.0):
+    """Whole-array ``ta.supertrend``; returns ``(trend, direction)`` arrays."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    trend, direction, _, _, _ = _supertrend_bands(high, low, close, length, multiplier)
+    return trend, direction
+
+
+def _prime(ewm, inputs, outputs):
+    # Put a _SeededEWM in the state it would have after streaming ``inputs``
+    if len(inputs) < ewm.length:
+        ewm._warmup = [float(x) for x in inputs]
+    else:
+        ewm._warmup = None
+        ewm.value = float(outputs[-1])
+
+
+def indicator_arrays(high, low, close, fast_length=100, slow_length=300, st_length=2, st_multiplier=30):
+    """Batch-compute the indicator columns and a ``StreamingIndicators`` primed to continue them.
+
+    Returns ``(columns, engine)`` where ``columns`` maps ``ema_fast``,
+    ``ema_slow``, ``supertrend`` and ``direction`` to arrays, and feeding the
+    next brick to ``engine.update`` yields what a full recomputation would.
+    """
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    n = close.size
+    with stage('indicators', items=n):
+        fast = ema(close, fast_length)
+        slow = ema(close, slow_length)
+        trend, direction, upper, lower, d = _supertrend_bands(high, low, close, st_length, st_multiplier)
+
+        engine = StreamingIndicators(fast_length, slow_length, st_length, st_multiplier)
+        engine.count = n
+        _prime(engine.fast, close, fast)
+        _prime(engine.slow, close, slow)
+        st = engine.supertrend
+        st.count = n
+        if n:
+            tr = high - low
+            tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - close[:-1]), np.abs(close[:-1] - low[1:])))
+            _prime(st.atr, tr, atr(high, low, close, st_length))
+            st.atr.prev_close = float(close[-1])
+            st.upper, st.lower, st.direction = upper, lower, d
+
+    columns = {'ema_fast': fast, 'ema_slow': slow, 'supertrend': trend, 'direction': direction}
+    return columns, engine
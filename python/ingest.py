@@ -0,0 +1,261 @@
+"""Bounded-memory ingest of large OHLC / tick CSV files.
+
+``iter_chunks`` streams a CSV (optionally a byte range of it) in fixed-size
+row chunks with explicit numeric dtypes and a vectorised timestamp parse;
+``renko_chunks`` feeds those chunks through the Renko builder, carrying the
+last brick close across chunk boundaries, so peak memory depends on the
+chunk size rather than the file size.
+
+``convert_csv`` writes a CSV once into raw binary column files (the same
+layout the Renko cache uses) that ``open_columns`` memory-maps and
+``iter_binary_chunks`` replays without any parsing.  ``iter_source`` reads
+either, so everything that takes a CSV path (``renko_from_csv``,
+``renko_cache.open_cached``, the sweep, the backend) also takes a converted
+directory::
+
+    python ingest.py EURUSD_1min.csv EURUSD_1min.bin
+    python sweep.py EURUSD_1min.bin
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from metrics import record
+from renko import bar_duration, intrabar_path, path_dates, renko_bricks
+
+DEFAULT_CHUNKSIZE = 1_000_000
+DEFAULT_DTYPES = {'Open': 'float64', 'High': 'float64', 'Low': 'float64', 'Close': 'float64', 'Volume': 'int64'}
+BINARY_VERSION = 1
+
+
+class _BoundedReader:
+    """File-like view of ``fh`` that stops after ``limit`` bytes."""
+
+    def __init__(self, fh, limit):
+        self.fh = fh
+        self.remaining = limit
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.fh.readline(self.remaining) if self.remaining > 0 else b''
+        if not line:
+            raise StopIteration
+        self.remaining -= len(line)
+        return line
+
+
+def read_header(path):
+    """Column names from the first line of ``path``."""
+    with open(path, 'rb') as fh:
+        return fh.readline().decode().strip().split(',')
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, usecols=None, dtype=None,
+                date_format='ISO8601', start=0, end=None, names=None):
+    """Yield DataFrames of at most ``chunksize`` rows from ``path``.
+
+    ``Date`` is parsed to ``datetime64[ns]``; other columns use ``dtype``
+    (``DEFAULT_DTYPES`` by default).  ``start``/``end`` restrict parsing to a
+    byte range that begins on a row boundary; when ``start`` is past the
+    header, pass the column ``names``.
+    """
+    names = names or read_header(path)
+    dtype = {k: v for k, v in (dtype or DEFAULT_DTYPES).items() if k in names}
+    if usecols is not None:
+        dtype = {k: v for k, v in dtype.items() if k in usecols}
+    end = os.path.getsize(path) if end is None else end
+
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        if start == 0:
+            header = fh.readline()
+            start = len(header)
+        reader = pd.read_csv(
+            _BoundedReader(fh, end - start), header=None, names=names, usecols=usecols,
+            dtype=dict(dtype, Date=str), chunksize=chunksize, engine='c',
+        )
+        chunks = iter(reader)
+        while True:
+            t0 = time.perf_counter_ns()
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            chunk['Date'] = pd.to_datetime(chunk['Date'], format=date_format).astype('datetime64[ns]')
+            record('csv_parse', time.perf_counter_ns() - t0, len(chunk))
+            yield chunk
+
+
+def renko_chunks(chunks, brick_size, last_close=None, order=None, duration=None):
+    """Turn a stream of Date/Close chunks into a stream of brick column dicts.
+
+    Yields ``(columns, last_close)`` per input chunk, where ``columns`` holds
+    ``Date`` (int64 ns) / ``Open`` / ``High`` / ``Low`` / ``Close`` arrays and
+    ``last_close`` is the Renko reference price after the chunk.  The state
+    carries over between chunks so the concatenated output equals a single
+    pass over the whole file.
+
+    With an intrabar ``order`` the chunks need Open/High/Low too and bricks
+    are built from ``renko.intrabar_path``; ``duration`` (bar length in ns)
+    is taken from the first chunk when not given.
+    """
+    for chunk in chunks:
+        close = np.asarray(chunk['Close'], dtype=np.float64)
+        if close.size == 0:
+            continue
+        dates = np.asarray(chunk['Date']).astype('datetime64[ns]').view(np.int64)
+        if order is not None:
+            if duration is None:
+                duration = bar_duration(dates)
+            close = intrabar_path(chunk['Open'], chunk['High'], chunk['Low'], close, order)
+            dates = path_dates(dates, duration)
+        if last_close is None:
+            last_close = float(close[0])
+        source_index, opens, highs, lows, closes = renko_bricks(close, brick_size, last_close)
+        if closes.size:
+            last_close = float(closes[-1])
+        dates = dates[source_index]
+        yield {'Date': dates, 'Open': opens, 'High': highs, 'Low': lows, 'Close': closes}, last_close
+
+
+def is_converted(path):
+    """Whether ``path`` is a directory written by ``convert_csv`` rather than a CSV."""
+    return os.path.isfile(os.path.join(path, 'meta.json'))
+
+
+def source_columns(path):
+    """Column names of a CSV or converted directory."""
+    if is_converted(path):
+        with open(os.path.join(path, 'meta.json')) as fh:
+            return list(json.load(fh)['columns'])
+    return read_header(path)
+
+
+def iter_source(path, chunksize=DEFAULT_CHUNKSIZE, usecols=None, start=0, end=None, names=None, **kwargs):
+    """Chunks of a CSV (``iter_chunks``) or of a converted directory (``iter_binary_chunks``).
+
+    ``start``/``end`` are byte offsets into a CSV and row numbers into a
+    converted directory; ``names`` and other keywords only apply to CSVs.
+    """
+    if is_converted(path):
+        return iter_binary_chunks(path, chunksize, usecols, start, end)
+    return iter_chunks(path, chunksize, usecols=usecols, start=start, end=end, names=names, **kwargs)
+
+
+def renko_from_csv(path, brick_size, chunksize=DEFAULT_CHUNKSIZE, order=None, **kwargs):
+    """Renko frame built from ``path`` without loading the whole file (intrabar with ``order``).
+
+    ``path`` may also be a directory written by ``convert_csv``.
+    """
+    usecols = ['Date', 'Close'] if order is None else ['Date', 'Open', 'High', 'Low', 'Close']
+    chunks = iter_source(path, chunksize, usecols=usecols, **kwargs)
+    parts = [columns for columns, _ in renko_chunks(chunks, brick_size, order=order)]
+    columns = {k: np.concatenate([p[k] for p in parts]) if parts else np.empty(0, dtype)
+               for k, dtype in (('Date', np.int64), ('Open', float), ('High', float),
+                                ('Low', float), ('Close', float))}
+    columns['Date'] = columns['Date'].view('datetime64[ns]')
+    return pd.DataFrame(columns)
+
+
+# -------------------- Raw column files --------------------
+
+def append_columns(directory, columns, dtypes, rows, truncate=False):
+    """Append ``columns`` to ``<name>.<kind><size>`` files holding ``rows`` rows.
+
+    Files are first cut back to ``rows`` so an append that was interrupted
+    before its metadata was committed is discarded.  ``truncate`` replaces
+    each file with a new one holding just ``columns``; the old file is never
+    cut in place, so existing memory maps of it stay valid.
+    """
+    for name, dtype in dtypes.items():
+        path = os.path.join(directory, f'{name}.{dtype[1:]}')
+        data = np.ascontiguousarray(columns[name], dtype=dtype).tobytes()
+        if truncate:
+            with open(path + '.tmp', 'wb') as fh:
+                fh.write(data)
+            os.replace(path + '.tmp', path)
+        else:
+            with open(path, 'ab') as fh:
+                fh.truncate(rows * np.dtype(dtype).itemsize)
+                fh.write(data)
+
+
+def map_columns(directory, dtypes, rows):
+    """Read-only memory maps of the first ``rows`` rows of each column file."""
+    arrays = {}
+    for name, dtype in dtypes.items():
+        if rows == 0:
+            arrays[name] = np.empty(0, dtype=dtype)
+        else:
+            path = os.path.join(directory, f'{name}.{dtype[1:]}')
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+    return arrays
+
+
+def convert_csv(path, out_dir, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+    """Convert ``path`` to binary column files in ``out_dir`` chunk by chunk.
+
+    Date is stored as int64 nanoseconds.  Returns the number of rows.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    dtypes = None
+    rows = 0
+    for chunk in iter_chunks(path, chunksize, **kwargs):
+        if dtypes is None:
+            dtypes = {name: '<i8' if name == 'Date' else np.dtype(chunk[name].dtype).newbyteorder('<').str
+                      for name in chunk.columns}
+        columns = {name: chunk[name].to_numpy() for name in chunk.columns}
+        columns['Date'] = columns['Date'].view(np.int64)
+        append_columns(out_dir, columns, dtypes, rows, truncate=rows == 0)
+        rows += len(chunk)
+
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as fh:
+        json.dump({'version': BINARY_VERSION, 'source': os.path.abspath(path),
+                   'columns': dtypes or {}, 'rows': rows}, fh)
+    return rows
+
+
+def open_columns(out_dir):
+    """Memory-map a directory written by ``convert_csv``; Date stays int64 ns."""
+    with open(os.path.join(out_dir, 'meta.json')) as fh:
+        meta = json.load(fh)
+    return map_columns(out_dir, meta['columns'], meta['rows'])
+
+
+def iter_binary_chunks(out_dir, chunksize=DEFAULT_CHUNKSIZE, usecols=None, start=0, end=None):
+    """Yield dicts of array slices (views, no copies) of rows ``start..end-1`` from a converted file."""
+    columns = open_columns(out_dir)
+    if usecols is not None:
+        columns = {name: columns[name] for name in usecols}
+    rows = len(next(iter(columns.values()))) if columns else 0
+    end = rows if end is None else min(end, rows)
+    for lo in range(start, end, chunksize):
+        hi = min(lo + chunksize, end)
+        chunk = {name: values[lo:hi] for name, values in columns.items()}
+        if 'Date' in chunk:
+            chunk['Date'] = chunk['Date'].view('datetime64[ns]')
+        yield chunk
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a market-data CSV to binary column files")
+    parser.add_argument('csv')
+    parser.add_argument('out_dir')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+    print(f"Converted {convert_csv(args.csv, args.out_dir, args.chunksize)} rows to {args.out_dir}")
@@ -0,0 +1,247 @@
+"""Incremental matplotlib rendering for the live playback scripts.
+
+``LiveChart`` keeps one persistent ``Line2D`` per series plus two scatter
+collections for BUY/SELL markers.  Each frame only updates the data of
+those artists for a sliding window of the last ``window`` bars (decimated
+to at most ``max_points`` points) and blits them over a cached background,
+so the cost of a frame does not depend on how much history has been
+played.  The axes are only fully redrawn when the window scrolls past the
+x-limits (every ``window // 4`` bars) or prices leave the y-limits.
+
+``blit=False`` keeps the original behaviour - clear the axes and replot
+the whole history every frame - for comparison.
+
+Headless benchmark::
+
+    python live_plot.py [--history 1000,100000,1000000] [--frames 300]
+"""
+import time
+
+import numpy as np
+
+from signals import BUY, SELL
+
+# Fraction of the y-range added above and below when the limits are refitted
+_Y_PAD = 0.1
+
+
+class LiveChart:
+    """Sliding-window live chart over arrays that grow in place.
+
+    ``series`` is a list of ``(label, values, style)`` where ``values`` is an
+    array the caller fills up to the current bar and ``style`` are
+    ``Axes.plot`` keyword arguments.  BUY/SELL markers are drawn at
+    ``close`` wherever ``codes`` holds a signal.  ``values`` may also be
+    ``ringbuffer.RingColumn``s, which only retain bars from ``first`` on.
+    """
+
+    def __init__(self, ax, series, close=None, codes=None, window=500, max_points=1000,
+                 blit=True, title=None):
+        self.ax = ax
+        self.fig = ax.figure
+        self.canvas = self.fig.canvas
+        self.series = series
+        self.close = close
+        self.codes = codes
+        self.window = int(window)
+        self.max_points = int(max_points)
+        self.blit = blit
+        self.title = title
+        self.frames = 0
+        self.full_draws = 0
+        if blit:
+            self._setup()
+
+    # -------------------- Blitted mode --------------------
+
+    def _setup(self):
+        ax = self.ax
+        self.lines = [ax.plot([], [], label=label, animated=True, **style)[0]
+                      for label, _, style in self.series]
+        self.markers = []
+        if self.codes is not None:
+            self.markers = [
+                ax.scatter([], [], marker='^', color='g', s=100, label='BUY Signal', animated=True),
+                ax.scatter([], [], marker='v', color='r', s=100, label='SELL Signal', animated=True),
+            ]
+        self.text = ax.text(0.01, 0.98, '', transform=ax.transAxes, va='top', animated=True)
+        if self.title:
+            ax.set_title(self.title)
+        ax.set_xlabel("Bars")
+        ax.set_ylabel("Price")
+        ax.legend(loc='upper right')
+        ax.set_xlim(0, self.window)
+        self._background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _artists(self):
+        return self.lines + self.markers + [self.text]
+
+    def _on_draw(self, event):
+        # Any full redraw (ours or a resize) refreshes the cached background
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._artists():
+            self.ax.draw_artist(artist)
+
+    def _first(self):
+        # Oldest bar still available (ring buffer columns drop old bars)
+        return getattr(self.series[0][1], 'first', 0)
+
+    def _visible(self, n):
+        lo = max(self._first(), n - self.window)
+        stride = -(-(n - lo) // self.max_points)
+        # Align samples to absolute bar numbers so points do not jitter as the window slides
+        first = lo + (-lo) % stride
+        idx = np.arange(first, n, stride)
+        if idx.size == 0 or idx[-1] != n - 1:
+            idx = np.append(idx, n - 1)
+        return lo, idx
+
+    def _fit_limits(self, n, lo, ys):
+        ax = self.ax
+        redraw = False
+        x0, x1 = ax.get_xlim()
+        if n > x1 or lo < x0:
+            right = n + self.window // 4
+            ax.set_xlim(right - self.window - self.window // 4, right)
+            redraw = True
+
+        finite = [y[np.isfinite(y)] for y in ys]
+        finite = [y for y in finite if y.size]
+        if finite:
+            low = min(y.min() for y in finite)
+            high = max(y.max() for y in finite)
+            y0, y1 = ax.get_ylim()
+            span = max(high - low, abs(high) * 1e-6, 1e-12)
+            # Refit when prices leave the limits or only use a small slice of them
+            if low < y0 or high > y1 or (y1 - y0) > 4 * span * (1 + 2 * _Y_PAD):
+                ax.set_ylim(low - span * _Y_PAD, high + span * _Y_PAD)
+                redraw = True
+        return redraw
+
+    def _draw_blit(self, n, label):
+        lo, idx = self._visible(n)
+        ys = [np.asarray(values[lo:n], dtype=np.float64) for _, values, _ in self.series]
+        for line, (_, values, _) in zip(self.lines, self.series):
+            line.set_data(idx, values[idx])
+
+        if self.markers:
+            window = np.asarray(self.codes[lo:n])
+            for marker, code in zip(self.markers, (BUY, SELL)):
+                at = lo + np.flatnonzero(window == code)
+                marker.set_offsets(np.column_stack([at, self.close[at]]))
+        self.text.set_text(label or '')
+
+        if self._fit_limits(n, lo, ys) or self._background is None:
+            self.full_draws += 1
+            self.canvas.draw()  # _on_draw recaptures the background
+        else:
+            self.canvas.restore_region(self._background)
+            for artist in self._artists():
+                self.ax.draw_artist(artist)
+            self.canvas.blit(self.fig.bbox)
+
+    # -------------------- Original full redraw --------------------
+
+    def _draw_full(self, n, label):
+        ax = self.ax
+        ax.clear()
+        first = self._first()
+        for name, values, style in self.series:
+            ax.plot(np.arange(first, n), values[first:n], label=name, **style)
+        if self.codes is not None:
+            codes = np.asarray(self.codes[first:n])
+            buy_idx = first + np.flatnonzero(codes == BUY)
+            sell_idx = first + np.flatnonzero(codes == SELL)
+            ax.scatter(buy_idx, self.close[buy_idx], marker='^', color='g', s=100, label='BUY Signal')
+            ax.scatter(sell_idx, self.close[sell_idx], marker='v', color='r', s=100, label='SELL Signal')
+        ax.set_title(f"{self.title} {label}" if label and self.title else (self.title or label or ''))
+        ax.set_xlabel("Bars")
+        ax.set_ylabel("Price")
+        ax.legend()
+        self.full_draws += 1
+        self.canvas.draw()
+
+    def draw(self, n, label=None):
+        """Render bars ``0..n-1`` (only the last ``window`` of them when blitting)."""
+        if n <= 0:
+            return
+        if self.blit:
+            self._draw_blit(n, label)
+        else:
+            self._draw_full(n, label)
+        self.frames += 1
+
+    def freeze(self):
+        """Turn the animated artists into normal ones so ``savefig`` includes them."""
+        if self.blit:
+            for artist in self._artists():
+                artist.set_animated(False)
+            self.blit = False
+            self.canvas.draw_idle()
+
+    def pause(self, interval):
+        """Process GUI events for ``interval`` seconds without forcing a full redraw.
+
+        ``plt.pause`` would redraw the whole figure, which drops the animated
+        artists and defeats blitting.
+        """
+        self.canvas.flush_events()
+        self.canvas.start_event_loop(interval)
+
+
+# -------------------- Headless benchmark --------------------
+
+def _synthetic(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.choice([-0.001, 0.001], n))
+    fast = close + rng.normal(0, 0.0005, n)
+    slow = close + rng.normal(0, 0.001, n)
+    codes = rng.choice(np.array([0, BUY, SELL], dtype=np.int8), n, p=[0.96, 0.02, 0.02])
+    return close, fast, slow, codes
+
+
+def benchmark(history, frames=300, window=500, max_points=1000, blit=True):
+    """Frames per second when playing the last ``frames`` bars of ``history`` bars."""
+    import matplotlib.pyplot as plt
+
+    close, fast, slow, codes = _synthetic(history)
+    fig, ax = plt.subplots(figsize=(12, 6))
+    chart = LiveChart(ax, [('Renko Close', close, {'color': 'blue'}),
+                           ('EMA fast', fast, {'color': 'orange'}),
+                           ('EMA slow', slow, {'color': 'purple'})],
+                      close=close, codes=codes, window=window, max_points=max_points, blit=blit,
+                      title="Benchmark")
+    start_bar = max(1, history - frames)
+    chart.draw(start_bar)  # initial full draw is not part of the steady state
+    t0 = time.perf_counter()
+    for n in range(start_bar + 1, history + 1):
+        chart.draw(n, f"{n}/{history}")
+    elapsed = time.perf_counter() - t0
+    plt.close(fig)
+    played = history - start_bar
+    return {'mode': 'blit' if blit else 'redraw', 'history': history, 'frames': played,
+            'fps': played / elapsed if elapsed else float('inf'), 'full_draws': chart.full_draws - 1}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    parser = argparse.ArgumentParser(description="Headless frame-rate benchmark for LiveChart")
+    parser.add_argument('--history', default='1000,100000,1000000',
+                        type=lambda s: [int(float(x)) for x in s.split(',')])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--window', type=int, default=500)
+    parser.add_argument('--max-points', type=int, default=1000)
+    parser.add_argument('--redraw-frames', type=int, default=20,
+                        help="frames for the full-redraw mode, which slows down with history")
+    args = parser.parse_args()
+
+    print(f"{'mode':>7} {'history':>9} {'frames':>7} {'fps':>9} {'full draws':>11}")
+    for history in args.history:
+        for blit, frames in ((True, args.frames), (False, args.redraw_frames)):
+            r = benchmark(history, frames, args.window, args.max_points, blit)
+            print(f"{r['mode']:>7} {r['history']:>9} {r['frames']:>7} {r['fps']:>9.1f} {r['full_draws']:>11}")
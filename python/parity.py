@@ -0,0 +1,190 @@
+"""Parity harness: vectorised Renko, indicators and signals against a cBot replay.
+
+The reference side replays prices one at a time the way the cBot sees a
+broker-built chart: each price that moves a brick away from the last brick
+close completes bricks (stamped with that price's time), every completed
+brick goes through ``StreamingIndicators``, and the ``OnBar`` rules of
+``EMA_Reversal_Supertrend.cs`` are evaluated with ``lastBar`` the brick
+before it and ``currentBar`` the brick just completed (the reading the
+Python scripts use).  It is plain scalar code with no shared kernels.
+
+The vectorised side is the production path: ``ingest.renko_chunks`` in
+chunks (so carry-over between chunks is covered), ``indicator_arrays`` and
+``compute_signals`` with the Supertrend read on the previous bar.
+
+Bricks (time, open, high, low, close) and signal codes must match exactly;
+indicators are reported as a maximum absolute difference.
+
+Two rule sets are replayed:
+
+* ``trend`` - ``EMA_Reversal_Supertrend.cs`` at the repository root:
+  longs need ``supertrend.UpTrend`` (Supertrend direction up), shorts
+  ``DownTrend``.  This is what the Python scripts implement, so it is the
+  parity check.
+* ``cbot`` - ``cBot/EMA_Reversal_Supertrend.cs`` as written: longs need
+  ``supertrend.Result > Close``, the opposite side.  Its disagreements are
+  reported, not failed on.
+
+Prices come from a CSV or ``ingest.convert_csv`` directory (ticks as
+``Date,Close``, or OHLC bars expanded with ``renko.intrabar_path``) or from
+``synthetic.generate``::
+
+    python parity.py [EURUSD_1min.csv] [--order nearest|ohlc|olhc|close] [--tick]
+                     [--rows 20000] [--brick-size 0.0005] [--chunksize 5000]
+"""
+import time
+
+import numpy as np
+
+from indicators import StreamingIndicators, indicator_arrays
+from ingest import renko_chunks
+from renko import INTRABAR_ORDERS, NEAREST, bar_duration, intrabar_path, path_dates
+from signals import BUY, HOLD, SELL, ST_PREV, compute_signals
+
+TREND = 'trend'
+CBOT = 'cbot'
+BRICK_FIELDS = ('Date', 'Open', 'High', 'Low', 'Close')
+
+
+def reference_replay(dates, prices, brick_size, fast_length=100, slow_length=300, st_length=2,
+                     st_multiplier=30, rules=TREND):
+    """Price-by-price brick building and ``OnBar`` evaluation; returns ``(bricks, values, codes)``.
+
+    ``bricks`` maps ``BRICK_FIELDS`` to arrays, ``values`` is the list of
+    ``IndicatorValues`` per brick and ``codes`` the signal per brick.
+    """
+    if rules not in (TREND, CBOT):
+        raise ValueError(f"rules must be '{TREND}' or '{CBOT}', got {rules!r}")
+    engine = StreamingIndicators(fast_length, slow_length, st_length, st_multiplier)
+    rows, values, codes = [], [], []
+    last = float(prices[0]) if len(prices) else None
+    for t, price in zip(np.asarray(dates).tolist(), np.asarray(prices, dtype=np.float64).tolist()):
+        while abs(price - last) >= brick_size:
+            open_ = last
+            last = last + brick_size if price > last else last - brick_size
+            rows.append((t, open_, max(open_, last), min(open_, last), last))
+            values.append(engine.update(max(open_, last), min(open_, last), last))
+            codes.append(_on_bar(rows, values, rules))
+    bricks = {name: np.array([r[k] for r in rows], dtype=np.int64 if k == 0 else np.float64)
+              for k, name in enumerate(BRICK_FIELDS)}
+    return bricks, values, np.array(codes, dtype=np.int8)
+
+
+def _on_bar(rows, values, rules):
+    if len(rows) < 2:
+        return HOLD
+    _, _, last_high, last_low, last_close = rows[-2]
+    _, current_open, _, _, current_close = rows[-1]
+    last = values[-2]
+    if rules == TREND:
+        up, down = last.direction == 1, last.direction == -1
+    else:
+        up, down = last.supertrend > last_close, last.supertrend < last_close
+    if up and last.ema_fast > last.ema_slow and last_low < last.ema_slow and current_close > current_open:
+        return BUY
+    if down and last.ema_fast < last.ema_slow and last_high > last.ema_slow and current_close < current_open:
+        return SELL
+    return HOLD
+
+
+def vectorised(dates, prices, brick_size, fast_length=100, slow_length=300, st_length=2, st_multiplier=30,
+               chunksize=None):
+    """The production pipeline on the same prices; returns ``(bricks, indicator columns, codes)``."""
+    chunksize = chunksize or len(prices) or 1
+    chunks = ({'Date': dates[k:k + chunksize], 'Close': prices[k:k + chunksize]}
+              for k in range(0, len(prices), chunksize))
+    parts = [columns for columns, _ in renko_chunks(chunks, brick_size)]
+    bricks = {name: np.concatenate([p[name] for p in parts]) if parts else np.empty(0) for name in BRICK_FIELDS}
+    columns, _ = indicator_arrays(bricks['High'], bricks['Low'], bricks['Close'],
+                                  fast_length, slow_length, st_length, st_multiplier)
+    codes = compute_signals(bricks['Open'], bricks['High'], bricks['Low'], bricks['Close'],
+                            columns['ema_fast'], columns['ema_slow'], columns['supertrend'], st_bar=ST_PREV)
+    return bricks, columns, codes
+
+
+def check(dates, prices, brick_size, chunksize=None, **params):
+    """Compare both sides on one price path; returns a report dict with ``ok``."""
+    t0 = time.perf_counter()
+    ref_bricks, ref_values, ref_codes = reference_replay(dates, prices, brick_size, rules=TREND, **params)
+    t1 = time.perf_counter()
+    bricks, columns, codes = vectorised(dates, prices, brick_size, chunksize=chunksize, **params)
+    t2 = time.perf_counter()
+    _, _, cbot_codes = reference_replay(dates, prices, brick_size, rules=CBOT, **params)
+
+    n = len(ref_codes)
+    brick_ok = len(codes) == n and all(np.array_equal(ref_bricks[k], bricks[k]) for k in BRICK_FIELDS)
+    report = {'prices': len(prices), 'bricks': len(codes), 'reference_bricks': n, 'bricks_match': brick_ok,
+              'reference_s': t1 - t0, 'vectorised_s': t2 - t1}
+    if brick_ok and n:
+        ref = np.array(ref_values, dtype=np.float64).reshape(-1, 4)
+        report['indicator_max_diff'] = {
+            name: float(np.nanmax(np.abs(ref[:, k] - columns[name]), initial=0.0))
+            for k, name in enumerate(('ema_fast', 'ema_slow', 'supertrend', 'direction'))
+        }
+        mismatched = np.flatnonzero(ref_codes != codes)
+        report.update(signals=int(np.count_nonzero(codes)), signal_mismatches=len(mismatched),
+                      first_signal_mismatch=int(mismatched[0]) if len(mismatched) else None,
+                      cbot_signals=int(np.count_nonzero(cbot_codes)),
+                      cbot_disagreements=int(np.count_nonzero(cbot_codes != codes)))
+    elif n or len(codes):
+        k = min(n, len(codes))
+        diff = [i for i in range(k) if any(ref_bricks[f][i] != bricks[f][i] for f in BRICK_FIELDS)]
+        report['first_brick_mismatch'] = diff[0] if diff else k
+    report['ok'] = brick_ok and report.get('signal_mismatches', 0) == 0
+    return report
+
+
+def price_path(columns, order=NEAREST, duration=None):
+    """``(dates, prices)`` to replay: ticks/closes as they are, OHLC bars via ``intrabar_path``."""
+    dates = np.asarray(columns['Date']).astype('datetime64[ns]').view(np.int64)
+    if order is None or 'High' not in columns:
+        return dates, np.asarray(columns['Close'], dtype=np.float64)
+    prices = intrabar_path(columns['Open'], columns['High'], columns['Low'], columns['Close'], order)
+    return path_dates(dates, bar_duration(dates) if duration is None else duration), prices
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Check vectorised Renko/signals against a cBot replay")
+    parser.add_argument('csv', nargs='?', help="CSV or ingest.convert_csv directory; default: synthetic data")
+    parser.add_argument('--order', choices=list(INTRABAR_ORDERS) + ['close'], default=NEAREST,
+                        help="intrabar order for OHLC bars; 'close' uses bar closes only")
+    parser.add_argument('--tick', action='store_true', help="synthetic ticks instead of 1-minute bars")
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--brick-size', type=float, default=0.0005)
+    parser.add_argument('--chunksize', type=int, default=5_000, help="rows per vectorised chunk")
+    parser.add_argument('--fast', type=int, default=100)
+    parser.add_argument('--slow', type=int, default=300)
+    parser.add_argument('--st-length', type=int, default=2)
+    parser.add_argument('--st-multiplier', type=float, default=30)
+    args = parser.parse_args()
+
+    if args.csv:
+        # The reference replay needs the whole path; chunks are only joined as arrays
+        from ingest import iter_source
+        chunks = list(iter_source(args.csv))
+        data = {name: np.concatenate([np.asarray(c[name]) for c in chunks]) for name in chunks[0]}
+    else:
+        from synthetic import generate
+        data = next(generate(args.rows, seed=args.seed, kind='tick' if args.tick else 'ohlcv',
+                             regimes=((0.5, 0.0), (1.0, 0.05), (1.0, -0.05), (2.5, 0.0))))
+    dates, prices = price_path(data, None if args.order == 'close' else args.order)
+    r = check(dates, prices, args.brick_size, chunksize=args.chunksize, fast_length=args.fast,
+              slow_length=args.slow, st_length=args.st_length, st_multiplier=args.st_multiplier)
+
+    print(f"{r['prices']} prices -> {r['bricks']} bricks (reference {r['reference_bricks']})  "
+          f"reference {r['reference_s']:.2f} s, vectorised {r['vectorised_s']:.3f} s")
+    if not r['bricks_match']:
+        print(f"bricks differ from brick {r['first_brick_mismatch']}")
+    else:
+        print("bricks match; indicator max |diff| " +
+              "  ".join(f"{k} {v:.3g}" for k, v in r['indicator_max_diff'].items()))
+        print(f"signals {r['signals']}, mismatches {r['signal_mismatches']}"
+              + (f" (first at brick {r['first_signal_mismatch']})" if r['signal_mismatches'] else ""))
+        print(f"cBot/ rules as written (Supertrend above Close for longs): {r['cbot_signals']} signals, "
+              f"{r['cbot_disagreements']} bricks disagree")
+    print("PARITY OK" if r['ok'] else "PARITY FAILED")
+    sys.exit(0 if r['ok'] else 1)
@@ -0,0 +1,233 @@
+"""Shared Renko brick builder used by every script and the web backend.
+
+The builder works on NumPy arrays in two passes:
+
+1. ``brick_counts`` walks the close prices once and records how many bricks
+   each input row closes (and in which direction).  Rows that cannot move
+   price a full brick away from the last brick close are skipped in bulk
+   with a vectorised search, so the Python-level work is proportional to the
+   number of rows that actually print bricks.  Where bricks come every few
+   rows (tick files, intrabar paths, small bricks) it switches to a plain
+   float loop over blocks of rows instead.
+
+   The scan is inherently sequential - each brick moves the reference the
+   next row is compared with, through a chain of float additions that must
+   match the original loop bit for bit - so the dense case stays
+   Python-speed: about 0.2-0.5 s per million input rows (measured on
+   EURUSD 1-minute bars expanded with ``intrabar_path``: 0.7 s per million
+   bars at 2-pip bricks, 1.8 s at 1 pip), against well under 0.1 s when
+   bricks are sparse.
+2. ``renko_bricks`` allocates the output once from the total count and fills
+   Date/Open/High/Low/Close with array operations.
+
+Brick closes are produced by a sequential ``np.add.accumulate`` of +/- brick
+steps, which performs the exact same chain of float additions as the
+original ``last_close + direction * brick_size`` loop, so the output is
+identical to the old per-row ``pd.concat`` implementation.
+
+The builder only sees the prices it is given.  Fed bar closes, a bar that
+travels several bricks through its High and Low and back loses them, and
+all bricks of one bar share its ``Date``.  Tick data has neither problem:
+pass the ticks as the closes.  For OHLC bars, ``intrabar_path`` expands
+every bar into the four prices Open, first extreme, second extreme, Close
+(``order`` picks which extreme comes first) with timestamps spread across
+the bar, and ``renko_df(..., order=...)`` builds bricks from that path.
+"""
+import numpy as np
+import pandas as pd
+
+from metrics import stage
+
+RENKO_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close']
+
+# Intrabar orders: High before Low, Low before High, or whichever is nearer the Open first
+OHLC = 'ohlc'
+OLHC = 'olhc'
+NEAREST = 'nearest'
+INTRABAR_ORDERS = (OHLC, OLHC, NEAREST)
+PATH_POINTS = 4
+
+# Rows scanned per vectorised search for the next brick-forming row.  The
+# window doubles while nothing is found so quiet stretches cost a handful of
+# NumPy calls rather than one Python iteration per row.
+_MIN_WINDOW = 64
+_MAX_WINDOW = 1 << 16
+
+# Dense stretches (a brick every few rows) are cheaper as a plain float loop
+# over a block than as several NumPy calls per hit: ``_DENSE_RUN`` hits in a
+# row, each within ``_DENSE_GAP`` rows of the last, switch to blocks of
+# ``_DENSE_BLOCK`` rows, kept while at least one row in ``_DENSE_GAP``
+# prints a brick.
+_DENSE_GAP = 16
+_DENSE_RUN = 8
+_DENSE_BLOCK = 4096
+
+
+def _scan_block(prices, last_close, brick_size):
+    # Same float operations as the vectorised search and the brick loop below
+    offsets, counts, directions = [], [], []
+    for k, price in enumerate(prices):
+        if abs(price - last_close) >= brick_size:
+            direction = 1 if price > last_close else -1
+            step = direction * brick_size
+            c = 0
+            while abs(price - last_close) >= brick_size:
+                last_close = last_close + step
+                c += 1
+            offsets.append(k)
+            counts.append(c)
+            directions.append(direction)
+    return offsets, counts, directions, last_close
+
+
+def brick_counts(close, brick_size, last_close=None):
+    """Return ``(counts, directions, last_close)`` for an array of closes.
+
+    ``counts[i]`` is the number of bricks closed by row ``i`` and
+    ``directions[i]`` is +1/-1 (0 when no brick forms).  ``last_close`` is the
+    close of the final brick, or the starting reference when no brick formed;
+    pass it back in to continue a series across chunks.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = close.size
+    counts = np.zeros(n, dtype=np.int64)
+    directions = np.zeros(n, dtype=np.int8)
+    if n == 0:
+        return counts, directions, last_close
+    if last_close is None:
+        last_close = float(close[0])
+
+    # Scratch buffers: dense inputs (tick files, intrabar paths) hit every few dozen rows
+    distance = np.empty(min(n, _MAX_WINDOW), dtype=np.float64)
+    hit = np.empty(distance.size, dtype=bool)
+    i = 0
+    window = _MIN_WINDOW
+    dense = False
+    run = 0
+    while i < n:
+        if dense:
+            block = close[i:i + _DENSE_BLOCK]
+            offsets, k, d, last_close = _scan_block(block.tolist(), last_close, brick_size)
+            if offsets:
+                offsets = np.add(offsets, i)
+                counts[offsets] = k
+                directions[offsets] = d
+            i += block.size
+            dense = len(offsets) * _DENSE_GAP >= block.size
+            run = 0
+            continue
+
+        segment = close[i:i + window]
+        m = segment.size
+        d = np.subtract(segment, last_close, out=distance[:m])
+        np.abs(d, out=d)
+        h = np.greater_equal(d, brick_size, out=hit[:m])
+        j = int(h.argmax())
+        if not h[j]:
+            i += m
+            window = min(window * 2, _MAX_WINDOW)
+            continue
+
+        i += j
+        run = run + 1 if j < _DENSE_GAP and window == _MIN_WINDOW else 0
+        dense = run >= _DENSE_RUN
+        price = float(close[i])
+        direction = 1 if price > last_close else -1
+        step = direction * brick_size
+        k = 0
+        while abs(price - last_close) >= brick_size:
+            last_close = last_close + step
+            k += 1
+        counts[i] = k
+        directions[i] = direction
+        i += 1
+        window = _MIN_WINDOW
+
+    return counts, directions, last_close
+
+
+def renko_bricks(close, brick_size, last_close=None):
+    """Build brick arrays from close prices.
+
+    Returns ``(source_index, open, high, low, close)`` where ``source_index``
+    maps every brick back to the input row that produced it.
+    """
+    with stage('renko') as timer:
+        close = np.asarray(close, dtype=np.float64)
+        if last_close is None and close.size:
+            last_close = float(close[0])
+        counts, directions, _ = brick_counts(close, brick_size, last_close)
+
+        total = int(counts.sum())
+        source_index = np.repeat(np.arange(close.size, dtype=np.int64), counts)
+        steps = np.empty(total + 1, dtype=np.float64)
+        steps[0] = last_close if total else np.nan
+        steps[1:] = np.repeat(directions, counts) * brick_size
+        levels = np.add.accumulate(steps)
+
+        opens = levels[:-1]
+        closes = levels[1:]
+        highs = np.maximum(opens, closes)
+        lows = np.minimum(opens, closes)
+        timer.items = total
+    return source_index, opens, highs, lows, closes
+
+
+def intrabar_path(open_, high, low, close, order=NEAREST):
+    """Flat price path visiting each bar's Open, both extremes and Close.
+
+    ``PATH_POINTS`` prices per bar: Open, then High and Low in ``order``,
+    then Close.
+    """
+    if order not in INTRABAR_ORDERS:
+        raise ValueError(f"order must be one of {INTRABAR_ORDERS}, got {order!r}")
+    open_, high, low, close = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    if order == OHLC:
+        high_first = np.ones(close.size, dtype=bool)
+    elif order == OLHC:
+        high_first = np.zeros(close.size, dtype=bool)
+    else:
+        high_first = high - open_ <= open_ - low
+    path = np.empty((close.size, PATH_POINTS), dtype=np.float64)
+    path[:, 0] = open_
+    path[:, 1] = np.where(high_first, high, low)
+    path[:, 2] = np.where(high_first, low, high)
+    path[:, 3] = close
+    return path.ravel()
+
+
+def bar_duration(dates):
+    """Typical bar length in ns (the median spacing of int64 ``dates``), 0 for fewer than two bars."""
+    dates = np.asarray(dates).astype('datetime64[ns]').view(np.int64)
+    return int(np.median(np.diff(dates))) if dates.size > 1 else 0
+
+
+def path_dates(dates, duration):
+    """Timestamps of the ``intrabar_path`` points: spread evenly over each bar's ``duration`` ns."""
+    dates = np.asarray(dates).astype('datetime64[ns]').view(np.int64)
+    offsets = np.arange(PATH_POINTS, dtype=np.int64) * (int(duration) // PATH_POINTS)
+    return (dates[:, None] + offsets).ravel()
+
+
+def renko_df(df, brick_size=0.001, order=None, duration=None):
+    """Build a Date/Open/High/Low/Close Renko frame.
+
+    By default from the ``Close`` column (tick data, or bar closes only).
+    With an intrabar ``order`` from the ``intrabar_path`` of every bar, each
+    brick stamped with the time of the path point that completed it;
+    ``duration`` is the bar length in ns (inferred from ``Date`` if omitted).
+    """
+    if order is None:
+        prices, dates = df['Close'].to_numpy(), df['Date'].to_numpy()
+    else:
+        prices = intrabar_path(df['Open'], df['High'], df['Low'], df['Close'], order)
+        duration = bar_duration(df['Date']) if duration is None else duration
+        dates = path_dates(df['Date'], duration).view('datetime64[ns]')
+    source_index, opens, highs, lows, closes = renko_bricks(prices, brick_size)
+    return pd.DataFrame({
+        'Date': dates[source_index],
+        'Open': opens,
+        'High': highs,
+        'Low': lows,
+        'Close': closes,
+    }, columns=RENKO_COLUMNS)
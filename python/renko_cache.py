@@ -0,0 +1,337 @@
+"""Persistent, memory-mappable cache of Renko bricks and indicator columns.
+
+Layout (one directory per data series and brick size)::
+
+    .renko_cache/<series-key>/
+        .lock                  held (flock) while the entry is built, extended or removed
+        meta.json              source size/mtime/fingerprint, brick count, last_close, build id
+        <build-id>/
+            Date.i8 Open.f8 ...    raw little-endian column files
+            ind-<params-key>/
+                meta.json          row count
+                EMA_fast.f8 ...    indicator columns
+                state.pkl          StreamingIndicators primed at the last brick
+
+The series key is a file-identity key, not a content hash: it hashes the
+source's absolute path, CSV header and first data row (a converted
+directory's column names and first date; all unchanged when rows are
+appended) together with the brick size and, for intrabar bricks,
+the intrabar order.  Whether the cached rows still match the content is
+decided by ``meta.json`` - file size and mtime, then a fingerprint of the
+last consumed bytes - so an edited file rebuilds its entry rather than
+getting another one.  Indicator sets are keyed by their parameters.  A
+warm start only reads the small ``meta.json`` files and memory-maps the
+column files.
+
+Sources - a CSV, or a directory written by ``ingest.convert_csv`` - are
+read in bounded-memory chunks by ``ingest.iter_source``.  When the source
+has grown and still ends with the bytes (rows, for a converted directory)
+it ended with when the cache was written, only the new rows are read: Renko continues from the
+stored ``last_close`` and indicators from the pickled streaming state.  Any
+other change rebuilds the entry into a new build directory, switches
+``meta.json`` to it and only then deletes the old one, so a file another
+reader still has mapped is never truncated under it (which would raise
+SIGBUS on access).  Column files are appended before the metadata is
+atomically replaced, so an interrupted update is ignored on the next load.
+Builders of one series take its lock in turn, so concurrent callers (the
+backend loads streams from several threads) wait for one build and then
+reuse it instead of deleting each other's.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: builders in one process still serialise on _LOCAL_LOCK
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from indicators import indicator_arrays
+from metrics import stage
+from ingest import (append_columns, is_converted, iter_source, map_columns, open_columns, renko_chunks,
+                    source_columns)
+from renko import bar_duration
+
+CACHE_VERSION = 3
+BRICK_COLUMNS = {'Date': '<i8', 'Open': '<f8', 'High': '<f8', 'Low': '<f8', 'Close': '<f8'}
+INDICATOR_COLUMNS = {'EMA_fast': '<f8', 'EMA_slow': '<f8', 'ST': '<f8', 'ST_dir': '<f8'}
+
+_LOCAL_LOCK = threading.Lock()
+
+# Bytes at the end of the consumed source region used to detect appends
+_FINGERPRINT_BYTES = 1 << 16
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+    return h.hexdigest()
+
+
+def _head_lines(path, count=2):
+    with open(path, 'rb') as fh:
+        return b''.join(fh.readline() for _ in range(count))
+
+
+def _identity(path):
+    # What stays the same while rows are appended: the CSV header and first
+    # row, or a converted directory's columns and first date
+    if is_converted(path):
+        with open(os.path.join(path, 'Date.i8'), 'rb') as fh:
+            return ','.join(source_columns(path)) + '|' + fh.read(8).hex()
+    return _head_lines(path)
+
+
+def _fingerprint(path, end):
+    if is_converted(path):
+        # ``end`` is a row count here: hash the last rows of every column
+        rows = _FINGERPRINT_BYTES // 64
+        columns = open_columns(path)
+        return _digest(*(np.ascontiguousarray(values[max(0, end - rows):end]).tobytes()
+                         for values in columns.values()))
+    with open(path, 'rb') as fh:
+        fh.seek(max(0, end - _FINGERPRINT_BYTES))
+        return _digest(fh.read(end - fh.tell()))
+
+
+def _source_end(path):
+    # Rows of a converted directory; bytes of a CSV, up to its last whole line
+    # (a writer may be mid-row at the end of the file)
+    if is_converted(path):
+        with open(os.path.join(path, 'meta.json')) as fh:
+            return json.load(fh)['rows']
+    size = os.path.getsize(path)
+    with open(path, 'rb') as fh:
+        fh.seek(max(0, size - _FINGERPRINT_BYTES))
+        tail = fh.read()
+    cut = tail.rfind(b'\n')
+    return size if cut < 0 else size - len(tail) + cut + 1
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json')) as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == CACHE_VERSION else None
+
+
+def _write_meta(directory, meta):
+    meta = dict(meta, version=CACHE_VERSION)
+    tmp = os.path.join(directory, 'meta.json.tmp')
+    with open(tmp, 'w') as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, os.path.join(directory, 'meta.json'))
+
+
+@contextlib.contextmanager
+def _locked(directory):
+    # One builder per series at a time, across threads and processes: without
+    # it two rebuilds race and each deletes the build the other is writing
+    if fcntl is None:
+        with _LOCAL_LOCK:
+            yield
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _remove_stale(directory, keep):
+    # Unlinking is safe while old builds are still mapped: the data lives
+    # until the last map goes away (where it is not, the next rebuild retries)
+    for name in os.listdir(directory):
+        if name not in keep:
+            target = os.path.join(directory, name)
+            if os.path.isdir(target):
+                shutil.rmtree(target, ignore_errors=True)
+            else:
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+
+
+def _sync_bricks(path, directory, brick_size, order=None):
+    """Bring the brick columns of the current build in ``directory`` up to date with ``path``."""
+    stat = os.stat(os.path.join(path, 'meta.json') if is_converted(path) else path)
+    meta = _read_meta(directory)
+    if meta and not os.path.isdir(os.path.join(directory, meta['build_id'])):
+        meta = None  # its build was deleted; nothing to extend
+    if meta and meta['mtime_ns'] == stat.st_mtime_ns and meta['file_size'] == stat.st_size:
+        return meta
+
+    end = _source_end(path)
+    appended = (
+        meta is not None
+        and end >= meta['source_end']
+        and _fingerprint(path, meta['source_end']) == meta['fingerprint']
+    )
+    if appended:
+        start, last_close, rows = meta['source_end'], meta['last_close'], meta['rows']
+        names, build_id = meta['source_columns'], meta['build_id']
+    else:
+        # A fresh build id is a fresh directory: columns readers have mapped stay intact
+        start, last_close, rows, names = 0, None, 0, None
+        build_id = os.urandom(8).hex()
+    build_dir = os.path.join(directory, build_id)
+
+    names = names or source_columns(path)
+    duration = None
+    if order is not None:
+        # Bar length for the intrabar timestamps; kept so appended rows use the same
+        duration = meta['duration'] if appended else bar_duration(
+            next(iter_source(path, chunksize=1000, usecols=['Date'], end=end, names=names))['Date'])
+    if not appended:
+        os.makedirs(build_dir)
+        append_columns(build_dir, {k: [] for k in BRICK_COLUMNS}, BRICK_COLUMNS, 0, truncate=True)
+    if end > start:
+        usecols = ['Date', 'Close'] if order is None else ['Date', 'Open', 'High', 'Low', 'Close']
+        chunks = iter_source(path, usecols=usecols, start=start, end=end, names=names)
+        for columns, last_close in renko_chunks(chunks, brick_size, last_close, order, duration):
+            append_columns(build_dir, columns, BRICK_COLUMNS, rows)
+            rows += columns['Close'].size
+
+    meta = {
+        'source': os.path.abspath(path),
+        'source_columns': names,
+        'source_end': end,
+        'file_size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'fingerprint': _fingerprint(path, end),
+        'brick_size': brick_size,
+        'order': order,
+        'duration': duration,
+        'last_close': last_close,
+        'rows': rows,
+        'build_id': build_id,
+    }
+    _write_meta(directory, meta)
+    if not appended:
+        _remove_stale(directory, ('.lock', 'meta.json', build_id))
+    return meta
+
+
+def _sync_indicators(directory, bricks, brick_meta, params):
+    """Bring the indicator columns in ``directory`` up to date with the bricks."""
+    os.makedirs(directory, exist_ok=True)
+    meta = _read_meta(directory)
+    state_path = os.path.join(directory, 'state.pkl')
+    rows = brick_meta['rows']
+    current = meta and meta['build_id'] == brick_meta['build_id'] and meta['rows'] <= rows
+    done = meta['rows'] if current else None
+    if done == rows:
+        return
+
+    if done:
+        with open(state_path, 'rb') as fh:
+            engine = pickle.load(fh)
+        with stage('indicators', items=rows - done):
+            values = [engine.update(h, l, c) for h, l, c in zip(
+                bricks['High'][done:], bricks['Low'][done:], bricks['Close'][done:])]
+        new = np.array(values, dtype=np.float64).reshape(-1, 4)
+        columns = dict(zip(INDICATOR_COLUMNS, new.T))
+        append_columns(directory, columns, INDICATOR_COLUMNS, done)
+    else:
+        cols, engine = indicator_arrays(bricks['High'], bricks['Low'], bricks['Close'], **params)
+        columns = dict(zip(INDICATOR_COLUMNS, (cols['ema_fast'], cols['ema_slow'],
+                                               cols['supertrend'], cols['direction'])))
+        append_columns(directory, columns, INDICATOR_COLUMNS, 0, truncate=True)
+
+    tmp = state_path + '.tmp'
+    with open(tmp, 'wb') as fh:
+        pickle.dump(engine, fh)
+    os.replace(tmp, state_path)
+    _write_meta(directory, dict(params, rows=rows, build_id=brick_meta['build_id']))
+
+
+def cache_dir_for(path):
+    """Default cache location: ``.renko_cache`` next to the source CSV."""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), '.renko_cache')
+
+
+def _series_dir(path, brick_size, order, cache_dir):
+    cache_dir = cache_dir or cache_dir_for(path)
+    key = [os.path.abspath(path), '|', _identity(path), '|', repr(float(brick_size))] + ([] if order is None else ['|', order])
+    return os.path.join(cache_dir, _digest(*key))
+
+
+def _params(fast_length, slow_length, st_length, st_multiplier):
+    return {'fast_length': fast_length, 'slow_length': slow_length,
+            'st_length': st_length, 'st_multiplier': float(st_multiplier)}
+
+
+def _params_key(params):
+    return 'ind-' + _digest(json.dumps(params, sort_keys=True))
+
+
+def open_cached(path, brick_size=0.001, fast_length=100, slow_length=300,
+                st_length=2, st_multiplier=30, cache_dir=None, order=None):
+    """Return a dict of memory-mapped brick and indicator columns for ``path``.
+
+    Builds or incrementally extends the cache entry first if needed.
+    Dates are int64 nanoseconds since the epoch.  With an intrabar
+    ``order`` (see ``renko.intrabar_path``) bricks follow each bar's
+    High/Low path instead of its Close.
+    """
+    series_dir = _series_dir(path, brick_size, order, cache_dir)
+    os.makedirs(series_dir, exist_ok=True)
+    params = _params(fast_length, slow_length, st_length, st_multiplier)
+    with _locked(series_dir):
+        meta = _sync_bricks(path, series_dir, brick_size, order)
+        rows = meta['rows']
+        build_dir = os.path.join(series_dir, meta['build_id'])
+        bricks = map_columns(build_dir, BRICK_COLUMNS, rows)
+        ind_dir = os.path.join(build_dir, _params_key(params))
+        _sync_indicators(ind_dir, bricks, meta, params)
+        bricks.update(map_columns(ind_dir, INDICATOR_COLUMNS, rows))
+    return bricks
+
+
+def remove_cached(path, brick_size=0.001, fast_length=100, slow_length=300,
+                  st_length=2, st_multiplier=30, cache_dir=None, order=None, bricks=False):
+    """Delete the cached indicator set for these parameters; with ``bricks`` the whole series entry.
+
+    Readers that still have the files mapped keep their data; the next
+    ``open_cached`` builds the entry again.
+    """
+    series_dir = _series_dir(path, brick_size, order, cache_dir)
+    if not os.path.isdir(series_dir):
+        return
+    with _locked(series_dir):
+        if bricks:
+            # The directory and its lock file stay, so builders waiting on the lock use the same one
+            _remove_stale(series_dir, ('.lock',))
+            return
+        meta = _read_meta(series_dir)
+        if meta is not None:
+            params = _params(fast_length, slow_length, st_length, st_multiplier)
+            shutil.rmtree(os.path.join(series_dir, meta['build_id'], _params_key(params)), ignore_errors=True)
+
+
+def load_renko(path, brick_size=0.001, fast_length=100, slow_length=300,
+               st_length=2, st_multiplier=30, cache_dir=None, order=None):
+    """Renko frame with ``EMA<fast>``, ``EMA<slow>`` and ``ST`` columns, via the cache."""
+    cols = open_cached(path, brick_size, fast_length, slow_length, st_length, st_multiplier, cache_dir, order)
+    return pd.DataFrame({
+        'Date': cols['Date'].view('datetime64[ns]'),
+        'Open': cols['Open'],
+        'High': cols['High'],
+        'Low': cols['Low'],
+        'Close': cols['Close'],
+        f'EMA{fast_length}': cols['EMA_fast'],
+        f'EMA{slow_length}': cols['EMA_slow'],
+        'ST': cols['ST'],
+    })
@@ -0,0 +1,129 @@
+"""Fixed-capacity NumPy ring buffer for live brick records.
+
+Every column is stored twice, back to back (``2 * capacity`` slots), and
+each record is written to both copies.  The most recent ``n <= capacity``
+records are then always one contiguous slice, so ``window`` returns plain
+NumPy views - no copy, no wrap-around handling in indicators, signal rules
+or the chart - while ``append`` stays O(1) and the oldest record is simply
+overwritten.  Memory is fixed at construction however long the process
+runs.
+
+Records are addressed by absolute position: the ``k``-th record ever
+appended is index ``k`` (``reset(first)`` restarts the count).  Only the
+last ``capacity`` are retained; ``first`` is the oldest one still held.
+``column(name)`` wraps a column in that absolute indexing so code written
+against a growing array - ``values[lo:n]``, ``values[idx]`` - reads a ring
+unchanged.
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """Last ``capacity`` records of the columns in ``dtype``.
+
+    ``dtype`` is a list of ``(name, type)`` pairs.  Float columns start out
+    as NaN, others as 0.
+    """
+
+    def __init__(self, capacity, dtype):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self.names = self.dtype.names
+        self._data = {name: np.zeros(2 * self.capacity, dtype=self.dtype[name]) for name in self.names}
+        self.reset()
+
+    def reset(self, first=0):
+        """Drop every record; the next one appended gets absolute index ``first``."""
+        for values in self._data.values():
+            values.fill(np.nan if values.dtype.kind == 'f' else 0)
+        self.total = int(first)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def first(self):
+        """Absolute index of the oldest retained record."""
+        return self.total - self._size
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self._data.values())
+
+    def append(self, *values, **named):
+        """Add one record, given positionally in column order or by name."""
+        if values:
+            named = dict(zip(self.names, values))
+        p = self.total % self.capacity
+        q = p + self.capacity
+        for name, value in named.items():
+            data = self._data[name]
+            data[p] = data[q] = value
+        self.total += 1
+        if self._size < self.capacity:
+            self._size += 1
+
+    def extend(self, columns):
+        """Add the rows of ``columns`` (name -> equal-length arrays) in one go."""
+        m = len(next(iter(columns.values())))
+        if m == 0:
+            return
+        skip = max(0, m - self.capacity)  # rows that would be overwritten straight away
+        slots = (self.total + skip + np.arange(m - skip)) % self.capacity
+        for name, values in columns.items():
+            data = self._data[name]
+            values = np.asarray(values)[skip:]
+            data[slots] = values
+            data[slots + self.capacity] = values
+        self.total += m
+        self._size = min(self._size + m, self.capacity)
+
+    def window(self, n=None):
+        """Zero-copy views of the last ``n`` records (all retained by default), per column."""
+        n = self._size if n is None else max(0, min(int(n), self._size))
+        end = self.total % self.capacity + self.capacity
+        return {name: values[end - n:end] for name, values in self._data.items()}
+
+    def column(self, name):
+        return RingColumn(self, name)
+
+    def get(self, name, index):
+        """Value of column ``name`` at absolute ``index``."""
+        if not self.first <= index < self.total:
+            raise IndexError(f"record {index} is not retained (have {self.first}..{self.total - 1})")
+        return self._data[name][index % self.capacity]
+
+
+class RingColumn:
+    """One ring column indexed by absolute record position, like a growing array."""
+
+    def __init__(self, ring, name):
+        self.ring = ring
+        self.name = name
+
+    @property
+    def first(self):
+        return self.ring.first
+
+    def __len__(self):
+        return self.ring.total
+
+    def __getitem__(self, key):
+        ring = self.ring
+        data = ring._data[self.name]
+        if isinstance(key, slice):
+            lo, hi, step = key.indices(ring.total)
+            lo = max(lo, ring.first)
+            hi = max(hi, lo)
+            # Contiguous in the mirrored buffer: the window ending at ``total`` ends at slot end
+            end = ring.total % ring.capacity + ring.capacity
+            return data[end - (ring.total - lo):end - (ring.total - hi):step]
+        if isinstance(key, (int, np.integer)):
+            return ring.get(self.name, int(key))
+        key = np.asarray(key)
+        if key.size and (key.min() < ring.first or key.max() >= ring.total):
+            raise IndexError(f"records outside {ring.first}..{ring.total - 1}")
+        return data[key % ring.capacity]
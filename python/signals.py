@@ -0,0 +1,78 @@
+"""Vectorised BUY/SELL rule evaluation over whole Renko/indicator arrays.
+
+Rules (``prev`` = bar i-1, ``curr`` = bar i):
+
+* BUY  - Supertrend below Close, fast EMA above slow EMA on ``prev``,
+  ``prev`` Low dipped below the slow EMA and ``curr`` is a green brick.
+* SELL - the mirror image.
+
+The scripts disagree on which bar the Supertrend test reads: the plotting
+scripts use ``prev`` while the web backend uses ``curr``.  ``st_bar``
+selects between the two so everything can share one kernel.
+"""
+import numpy as np
+
+from metrics import stage
+
+HOLD = 0
+BUY = 1
+SELL = -1
+
+ST_PREV = 'prev'
+ST_CURR = 'curr'
+
+_LABELS = np.array(['SELL', 'HOLD', 'BUY'], dtype=object)
+
+
+def compute_signals(open_, high, low, close, ema_fast, ema_slow, supertrend, st_bar=ST_PREV, start=1):
+    """Return an int8 array of ``BUY``/``SELL``/``HOLD`` codes, one per bar.
+
+    Bars before ``start`` (and always bar 0) are ``HOLD``.  A bar is also
+    ``HOLD`` while any indicator it reads is still NaN during warm-up.
+    """
+    if st_bar not in (ST_PREV, ST_CURR):
+        raise ValueError(f"st_bar must be '{ST_PREV}' or '{ST_CURR}', got {st_bar!r}")
+
+    open_, high, low, close, ema_fast, ema_slow, supertrend = (
+        np.asarray(a, dtype=np.float64)
+        for a in (open_, high, low, close, ema_fast, ema_slow, supertrend)
+    )
+    n = close.size
+    codes = np.zeros(n, dtype=np.int8)
+    start = max(int(start), 1)
+    if n <= start:
+        return codes
+
+    with stage('signals', items=n - start):
+        cur = slice(start, n)
+        prv = slice(start - 1, n - 1)
+        st = supertrend[prv] if st_bar == ST_PREV else supertrend[cur]
+        st_close = close[prv] if st_bar == ST_PREV else close[cur]
+        fast = ema_fast[prv]
+        slow = ema_slow[prv]
+
+        valid = ~(np.isnan(st) | np.isnan(fast) | np.isnan(slow))
+        green = close[cur] > open_[cur]
+        red = close[cur] < open_[cur]
+
+        buy = valid & (st < st_close) & (fast > slow) & (low[prv] < slow) & green
+        sell = valid & (st > st_close) & (fast < slow) & (high[prv] > slow) & red & ~buy
+
+        out = codes[cur]
+        out[buy] = BUY
+        out[sell] = SELL
+    return codes
+
+
+def signal_labels(codes):
+    """Map signal codes to the ``'BUY'``/``'SELL'``/``'HOLD'`` strings used in frames."""
+    return _LABELS[np.asarray(codes, dtype=np.int64) + 1]
+
+
+def renko_signals(renko, fast_col, slow_col, st_col='ST', st_bar=ST_PREV, start=1):
+    """Signal codes for a Renko frame carrying EMA and Supertrend columns."""
+    return compute_signals(
+        renko['Open'], renko['High'], renko['Low'], renko['Close'],
+        renko[fast_col], renko[slow_col], renko[st_col],
+        st_bar=st_bar, start=start,
+    )
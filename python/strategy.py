@@ -0,0 +1,78 @@
+"""Incremental per-symbol strategy state: Renko -> indicators -> signals.
+
+``SymbolState`` holds everything one symbol needs to continue from where
+it stopped - the Renko reference price, a ``StreamingIndicators`` engine and
+the previous brick's values for the signal rules - and is small and
+picklable, so ``process_chunk`` can run in any worker process and hand
+the updated state back.
+"""
+import numpy as np
+
+from indicators import StreamingIndicators
+from metrics import stage
+from renko import renko_bricks
+from signals import ST_CURR, compute_signals
+
+CHUNK_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'EMA_fast', 'EMA_slow', 'ST', 'Signal']
+
+
+class SymbolState:
+    """Streaming state for one symbol.
+
+    Signals follow the web backend: Supertrend read on the current brick
+    (``st_bar``) and nothing before brick ``min_bars`` (slow EMA length + 1
+    by default).
+    """
+
+    def __init__(self, symbol, brick_size=0.001, fast_length=100, slow_length=300,
+                 st_length=2, st_multiplier=30, st_bar=ST_CURR, min_bars=None):
+        self.symbol = symbol
+        self.brick_size = brick_size
+        self.params = {'fast_length': fast_length, 'slow_length': slow_length,
+                       'st_length': st_length, 'st_multiplier': st_multiplier}
+        self.engine = StreamingIndicators(fast_length, slow_length, st_length, st_multiplier)
+        self.st_bar = st_bar
+        self.min_bars = slow_length + 1 if min_bars is None else min_bars
+        self.last_close = None
+        self.bricks = 0
+        # Open/High/Low/Close/EMA_fast/EMA_slow/ST of the last brick
+        self.prev = None
+
+
+def process_chunk(state, dates, closes):
+    """Feed raw ``dates`` (int64 ns) / ``closes`` to ``state``.
+
+    Returns ``(state, columns)`` where ``columns`` maps ``CHUNK_COLUMNS`` to
+    arrays with one row per new brick.  ``state`` is updated in place and
+    returned so callers in other processes get it back.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.size and state.last_close is None:
+        state.last_close = float(closes[0])
+    source_index, opens, highs, lows, brick_closes = renko_bricks(closes, state.brick_size, state.last_close)
+    n = brick_closes.size
+    columns = {'Date': np.asarray(dates, dtype=np.int64)[source_index], 'Open': opens, 'High': highs,
+               'Low': lows, 'Close': brick_closes}
+    if n == 0:
+        columns.update({name: np.empty(0) for name in ('EMA_fast', 'EMA_slow', 'ST')})
+        columns['Signal'] = np.empty(0, dtype=np.int8)
+        return state, columns
+
+    with stage('indicators', items=n):
+        values = np.array([state.engine.update(h, l, c) for h, l, c in zip(highs, lows, brick_closes)],
+                          dtype=np.float64)
+    columns['EMA_fast'], columns['EMA_slow'], columns['ST'] = values[:, 0], values[:, 1], values[:, 2]
+
+    # Prepend the previous brick so the rules can look one bar back across chunks
+    rows = [columns[name] for name in ('Open', 'High', 'Low', 'Close', 'EMA_fast', 'EMA_slow', 'ST')]
+    if state.prev is not None:
+        rows = [np.concatenate(([p], r)) for p, r in zip(state.prev, rows)]
+    first = state.bricks - (state.prev is not None)
+    start = max(state.min_bars - first, 1)
+    codes = compute_signals(*rows, st_bar=state.st_bar, start=start)
+    columns['Signal'] = codes[-n:]
+
+    state.last_close = float(brick_closes[-1])
+    state.bricks += n
+    state.prev = tuple(float(r[-1]) for r in rows)
+    return state, columns
@@ -0,0 +1,169 @@
+"""Parallel parameter sweep over brick size, EMA lengths and Supertrend settings.
+
+The source (a CSV, or a directory written by ``ingest.convert_csv``) is
+read once in bounded-memory chunks, feeding every brick size's Renko
+builder as it goes.  Each brick size's series is published
+in ``multiprocessing.shared_memory``; workers attach to it read-only, so a
+task on the pool is just a tuple of parameters and segment names rather
+than a pickled DataFrame.  Every worker computes indicators, signals and a
+backtest for its combination and returns the stats; the parent collects
+them into one ranked table.
+
+Usage::
+
+    python sweep.py [EURUSD_1min.csv | converted dir] [--workers N] [--rank-by total_pnl]
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import backtest_arrays
+from indicators import ema, supertrend
+from ingest import iter_source, renko_chunks
+from renko import RENKO_COLUMNS
+from signals import ST_PREV, compute_signals
+
+PARAM_NAMES = ['brick_size', 'fast_length', 'slow_length', 'st_length', 'st_multiplier', 'stop_loss_pips']
+
+DEFAULT_GRID = {
+    'brick_size': [0.0005, 0.0010, 0.0020],
+    'fast_length': [20, 50, 100],
+    'slow_length': [50, 100, 300],
+    'st_length': [2, 7],
+    'st_multiplier': [3.0, 10.0, 30.0],
+    'stop_loss_pips': [5.0],
+}
+
+_BRICK_FIELDS = ['dates', 'open', 'high', 'low', 'close']
+
+# Per-worker attachments, keyed by segment name
+_attached = {}
+
+
+def expand_grid(grid):
+    """All parameter combinations in ``grid`` with ``fast_length < slow_length``."""
+    values = [grid.get(name, DEFAULT_GRID[name]) for name in PARAM_NAMES]
+    combos = []
+    for combo in itertools.product(*values):
+        params = dict(zip(PARAM_NAMES, combo))
+        if params['fast_length'] < params['slow_length']:
+            combos.append(params)
+    return combos
+
+
+def _publish(arrays):
+    """Copy ``arrays`` into one shared-memory block; return (block, layout)."""
+    total = sum(a.nbytes for a in arrays.values())
+    block = shared_memory.SharedMemory(create=True, size=max(total, 1))
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, offset=offset)
+        view[:] = array
+        layout[name] = (offset, array.shape, array.dtype.str)
+        offset += array.nbytes
+    return block, (block.name, layout)
+
+
+def _attach(handle):
+    name, layout = handle
+    if name not in _attached:
+        block = shared_memory.SharedMemory(name=name)
+        arrays = {}
+        for field, (offset, shape, dtype) in layout.items():
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[field] = view
+        _attached[name] = (block, arrays)
+    return _attached[name][1]
+
+
+def evaluate(params, bricks, st_bar=ST_PREV):
+    """Indicators, signals and backtest stats for one parameter set."""
+    trend, _ = supertrend(bricks['high'], bricks['low'], bricks['close'],
+                          params['st_length'], params['st_multiplier'])
+    fast = ema(bricks['close'], params['fast_length'])
+    slow = ema(bricks['close'], params['slow_length'])
+    codes = compute_signals(bricks['open'], bricks['high'], bricks['low'], bricks['close'],
+                            fast, slow, trend, st_bar=st_bar)
+    result = backtest_arrays(bricks['dates'], bricks['open'], bricks['high'], bricks['low'],
+                             bricks['close'], trend, codes, stop_loss_pips=params['stop_loss_pips'])
+    stats = dict(params)
+    stats['bricks'] = int(bricks['close'].size)
+    stats.update(result.stats)
+    return stats
+
+
+def _run_task(task):
+    params, handle, st_bar = task
+    return evaluate(params, _attach(handle), st_bar)
+
+
+def build_bricks(source, brick_sizes):
+    """Renko arrays (dates as int64 ns) per brick size, from one chunked pass over ``source``."""
+    parts = {b: [] for b in brick_sizes}
+    last_close = dict.fromkeys(brick_sizes)
+    for chunk in iter_source(source, usecols=['Date', 'Close']):
+        for b in brick_sizes:
+            for columns, last_close[b] in renko_chunks([chunk], b, last_close[b]):
+                parts[b].append(columns)
+    return {b: {field: np.concatenate([p[name] for p in parts[b]]) if parts[b]
+                else np.empty(0, np.int64 if name == 'Date' else np.float64)
+                for field, name in zip(_BRICK_FIELDS, RENKO_COLUMNS)}
+            for b in brick_sizes}
+
+
+def run_sweep(source, grid=None, workers=None, rank_by='total_pnl', st_bar=ST_PREV):
+    """Evaluate every combination in ``grid`` on ``source`` (CSV or converted directory); a ranked frame."""
+    combos = expand_grid(grid or DEFAULT_GRID)
+    workers = workers or os.cpu_count() or 1
+
+    blocks = []
+    handles = {}
+    try:
+        bricks = build_bricks(source, sorted({p['brick_size'] for p in combos}))
+        for brick_size, columns in bricks.items():
+            block, handle = _publish(columns)
+            blocks.append(block)
+            handles[brick_size] = handle
+
+        tasks = [(p, handles[p['brick_size']], st_bar) for p in combos]
+        if workers == 1:
+            rows = [_run_task(t) for t in tasks]
+        else:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = list(pool.map(_run_task, tasks, chunksize=chunksize))
+    finally:
+        for name in list(_attached):
+            _attached.pop(name)[0].close()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    table = table.sort_values(rank_by, ascending=False, ignore_index=True)
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Parameter sweep for the EMA + Supertrend Renko strategy")
+    parser.add_argument('csv', nargs='?', default="EURUSD_1min.csv", help="CSV or ingest.convert_csv directory")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rank-by', default='total_pnl')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = run_sweep(args.csv, workers=args.workers, rank_by=args.rank_by)
+    elapsed = time.perf_counter() - start
+    print(table.head(25).to_string(index=False))
+    print(f"{len(table)} combinations in {elapsed:.2f}s")
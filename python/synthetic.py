@@ -0,0 +1,226 @@
+"""Seeded, vectorised synthetic market data for scale tests and benchmarks.
+
+``generate`` yields blocks of at most ``BLOCK_ROWS`` rows as column dicts
+(``Date`` as int64 ns).  Block ``k`` draws from its own generator seeded
+with ``(seed, k)``, so a seed always produces the same rows however the
+output is consumed or written.
+
+Prices are a geometric random walk whose volatility and drift switch
+between ``regimes`` - ``(volatility multiplier, drift in volatilities per
+bar)`` pairs - after geometrically distributed runs of ``regime_length``
+bars on average.  With ``gap_prob`` > 0 a bar opens away from the previous
+close by ``gap_sigma`` volatilities and its timestamp skips
+``gap_duration`` (a market closure).
+
+``kind='ohlcv'`` gives ``Date/Open/High/Low/Close/Volume`` bars every
+``freq``; ``kind='tick'`` gives ``Date/Close/Volume`` ticks with
+exponential inter-arrival times averaging ``freq``.  ``write_csv`` writes
+what ``ingest.iter_chunks`` reads; ``write_columns`` writes the raw column
+layout of ``ingest.convert_csv`` for ``ingest.open_columns``.
+
+Usage::
+
+    python synthetic.py [EURUSD_1min.csv] [--rows 3000] [--seed 0] [--kind ohlcv|tick]
+                        [--regimes trending] [--gap-prob 0.0005] [--format csv|binary]
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import BINARY_VERSION, append_columns
+
+BLOCK_ROWS = 1_000_000
+
+REGIMES = {
+    'flat': ((1.0, 0.0),),
+    # quiet range, up and down trends, volatile range
+    'trending': ((0.5, 0.0), (1.0, 0.05), (1.0, -0.05), (2.5, 0.0)),
+}
+
+OHLCV_DTYPES = {'Date': '<i8', 'Open': '<f8', 'High': '<f8', 'Low': '<f8', 'Close': '<f8', 'Volume': '<i8'}
+TICK_DTYPES = {'Date': '<i8', 'Close': '<f8', 'Volume': '<i8'}
+
+
+def generate(rows, seed=0, kind='ohlcv', start='2025-10-07', freq='1min', price=1.1, volatility=1e-4,
+             regimes=REGIMES['flat'], regime_length=5000, gap_prob=0.0, gap_sigma=20.0, gap_duration='1h',
+             volume=150, decimals=5):
+    """Yield column dicts of at most ``BLOCK_ROWS`` rows, ``rows`` in total."""
+    if kind not in ('ohlcv', 'tick'):
+        raise ValueError(f"kind must be 'ohlcv' or 'tick', not {kind!r}")
+    vol_mult = np.array([r[0] for r in regimes], dtype=np.float64)
+    drift_mult = np.array([r[1] for r in regimes], dtype=np.float64)
+    freq_ns = pd.Timedelta(freq).value
+    gap_ns = pd.Timedelta(gap_duration).value
+    last_time = pd.Timestamp(start).value - (freq_ns if kind == 'ohlcv' else 0)
+    log_close = np.log(price)
+    regime = 0
+
+    for block, first in enumerate(range(0, rows, BLOCK_ROWS)):
+        n = min(BLOCK_ROWS, rows - first)
+        rng = np.random.default_rng([seed, block])
+
+        # Regime per row: a new regime starts with probability 1/regime_length
+        runs = np.cumsum(rng.random(n) < 1.0 / regime_length)
+        picks = rng.integers(len(regimes), size=runs[-1] + 1)
+        picks[0] = regime
+        row_regime = picks[runs]
+        regime = int(row_regime[-1])
+        sigma = volatility * vol_mult[row_regime]
+
+        returns = volatility * drift_mult[row_regime] + sigma * rng.standard_normal(n)
+        gaps = rng.random(n) < gap_prob if gap_prob else np.zeros(n, dtype=bool)
+        jumps = np.where(gaps, gap_sigma * volatility * rng.standard_normal(n), 0.0)
+
+        if kind == 'ohlcv':
+            steps = np.full(n, freq_ns, dtype=np.int64)
+        else:
+            steps = np.maximum(rng.exponential(freq_ns, n), 1).astype(np.int64)
+        steps[gaps] += gap_ns
+        dates = last_time + np.cumsum(steps)
+        last_time = int(dates[-1])
+
+        log_path = log_close + np.cumsum(jumps + returns)
+        close = np.round(np.exp(log_path), decimals)
+        if kind == 'tick':
+            columns = {'Date': dates, 'Close': close, 'Volume': rng.integers(1, 10, n)}
+        else:
+            # Open is the previous close, moved by the gap if there is one
+            log_open = np.concatenate(([log_close], log_path[:-1])) + jumps
+            open_ = np.round(np.exp(log_open), decimals)
+            wick = sigma * np.abs(rng.standard_normal((2, n)))
+            high = np.round(np.maximum(open_, close) * np.exp(wick[0]), decimals)
+            low = np.round(np.minimum(open_, close) * np.exp(-wick[1]), decimals)
+            columns = {'Date': dates, 'Open': open_, 'High': high, 'Low': low, 'Close': close,
+                       'Volume': rng.poisson(volume * vol_mult[row_regime])}
+        log_close = float(log_path[-1])
+        yield columns
+
+
+def generate_frame(rows, **kwargs):
+    """``generate`` collected into one DataFrame with a datetime ``Date`` column."""
+    blocks = list(generate(rows, **kwargs))
+    frame = pd.DataFrame({name: np.concatenate([b[name] for b in blocks]) for name in blocks[0]})
+    frame['Date'] = frame['Date'].values.view('datetime64[ns]')
+    return frame
+
+
+def _digits(values):
+    """ASCII digits of non-negative ints as an ``(n, width)`` matrix plus a mask dropping leading zeros."""
+    width = max(len(str(int(values.max()))) if values.size else 1, 1)
+    dtype = np.int32 if width < 10 else np.int64
+    values = values.astype(dtype, copy=False)
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=dtype)
+    digits = (values[:, None] // powers % 10 + 48).astype(np.uint8)
+    keep = (values[:, None] >= powers) | (powers == 1)
+    return digits, keep
+
+
+def _csv_bytes(columns, decimals):
+    # pandas' to_csv formats cell by cell (~10 s per million bars); build the
+    # rows as one byte matrix instead and drop the padding with a mask
+    n = len(columns['Date'])
+    ns = columns['Date']
+    # Format each distinct day once; the time of day is plain arithmetic
+    days, day_index = np.unique(ns // 86_400_000_000_000, return_inverse=True)
+    day_text = np.datetime_as_string(days.astype('datetime64[D]')).astype('S10').view(np.uint8).reshape(-1, 10)
+    ms = ns % 86_400_000_000_000 // 1_000_000
+    fields = [ms // 3_600_000, ms // 60_000 % 60, ms // 1000 % 60]
+    clock = np.stack([f // 10 for f in fields] + [f % 10 for f in fields], axis=1)[:, [0, 3, 1, 4, 2, 5]] + 48
+    date = np.empty((n, 19), dtype=np.uint8)
+    date[:, :10] = day_text[day_index]
+    date[:, 10] = ord(' ')
+    date[:, [11, 12, 14, 15, 17, 18]] = clock
+    date[:, [13, 16]] = ord(':')
+    if (ms % 1000).any():
+        frac, _ = _digits(ms % 1000 + 1000)
+        date = np.hstack([date, np.full((n, 1), ord('.'), dtype=np.uint8), frac[:, 1:]])
+    parts, masks = [date], [np.ones(date.shape, dtype=bool)]
+
+    def fixed(char):
+        parts.append(np.full((n, 1), ord(char), dtype=np.uint8))
+        masks.append(np.ones((n, 1), dtype=bool))
+
+    scale = 10 ** decimals
+    for name, values in columns.items():
+        if name == 'Date':
+            continue
+        fixed(',')
+        if values.dtype.kind == 'f':
+            scaled = np.rint(values * scale).astype(np.int64)
+            digits, keep = _digits(scaled // scale)
+            parts += [digits]
+            masks += [keep]
+            fixed('.')
+            digits, _ = _digits(scaled % scale + scale)  # leading 1 keeps the fraction's zeros
+            parts.append(digits[:, 1:])
+            masks.append(np.ones((n, decimals), dtype=bool))
+        else:
+            digits, keep = _digits(values.astype(np.int64))
+            parts.append(digits)
+            masks.append(keep)
+    fixed('\n')
+    return np.hstack(parts)[np.hstack(masks)].tobytes()
+
+
+def write_csv(path, blocks, decimals=5):
+    """Write ``generate`` blocks (positive prices) as CSV; returns the number of rows."""
+    rows = 0
+    with open(path, 'wb') as fh:
+        for columns in blocks:
+            if rows == 0:
+                fh.write((','.join(columns) + '\n').encode())
+            fh.write(_csv_bytes(columns, decimals))
+            rows += len(columns['Date'])
+    return rows
+
+
+def write_columns(out_dir, blocks, params=None):
+    """Write ``generate`` blocks as raw column files readable by ``ingest.open_columns``."""
+    os.makedirs(out_dir, exist_ok=True)
+    dtypes = None
+    rows = 0
+    for columns in blocks:
+        if dtypes is None:
+            dtypes = OHLCV_DTYPES if 'Open' in columns else TICK_DTYPES
+        append_columns(out_dir, columns, dtypes, rows, truncate=rows == 0)
+        rows += len(columns['Date'])
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as fh:
+        json.dump({'version': BINARY_VERSION, 'source': 'synthetic', 'params': params or {},
+                   'columns': dtypes or {}, 'rows': rows}, fh)
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic OHLCV or tick data")
+    parser.add_argument('output', nargs='?', default='EURUSD_1min.csv')
+    parser.add_argument('--rows', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--kind', choices=['ohlcv', 'tick'], default='ohlcv')
+    parser.add_argument('--format', choices=['csv', 'binary'], help="default: csv for *.csv, else binary")
+    parser.add_argument('--start', default='2025-10-07')
+    parser.add_argument('--freq', default='1min', help="bar size, or mean tick interval")
+    parser.add_argument('--price', type=float, default=1.1)
+    parser.add_argument('--volatility', type=float, default=1e-4, help="per-row log-return sigma")
+    parser.add_argument('--regimes', choices=sorted(REGIMES), default='flat')
+    parser.add_argument('--regime-length', type=float, default=5000)
+    parser.add_argument('--gap-prob', type=float, default=0.0)
+    parser.add_argument('--gap-sigma', type=float, default=20.0)
+    parser.add_argument('--gap-duration', default='1h')
+    args = parser.parse_args()
+
+    params = {k: v for k, v in vars(args).items() if k not in ('output', 'rows', 'format')}
+    params['regimes'] = REGIMES[args.regimes]
+    blocks = generate(args.rows, **params)
+    fmt = args.format or ('csv' if args.output.endswith('.csv') else 'binary')
+    t0 = time.perf_counter()
+    if fmt == 'csv':
+        rows = write_csv(args.output, blocks)
+    else:
+        rows = write_columns(args.output, blocks, dict(params, regimes=args.regimes))
+    elapsed = time.perf_counter() - t0
+    print(f"{rows} rows -> {args.output} ({fmt}) in {elapsed:.2f} s ({rows / elapsed:,.0f} rows/s)")
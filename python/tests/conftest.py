@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules live side by side in python/ (and web/backend/) and import each other by name
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, '..'), os.path.join(HERE, '..', '..', 'web', 'backend')]
@@ -0,0 +1,151 @@
+"""Compare the JSON chart stream with the binary snapshot + delta protocol.
+
+For a history of ``--bars`` bars, measures bytes on the wire and client
+parse time for
+
+* backfill - ``--bars`` JSON messages (one per brick, today's stream)
+  versus one binary SNAPSHOT decimated to ``--points`` points;
+* steady state - one brick per tick, and ``--coalesce`` bricks per tick
+  (JSON sends one message each, binary one multi-row DELTA).
+
+Parse time is measured with Python (``json.loads`` vs ``protocol.unpack``)
+and, when ``node`` is on the PATH, with the frontend decoder
+(``JSON.parse`` vs ``decodeFrame`` from ``src/chartProtocol.js``).
+
+Usage::
+
+    python bench_protocol.py [--bars 5000] [--points 500] [--coalesce 10]
+"""
+import argparse
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'python'))
+from broadcast import JsonFormat
+from protocol import BinaryFormat, snapshot_frame, unpack
+
+FRONTEND_DECODER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'src', 'chartProtocol.js')
+
+_NODE_BENCH = r"""
+import { readFileSync } from 'node:fs';
+import { decodeFrame } from '%(decoder)s';
+const data = JSON.parse(readFileSync(process.argv[2], 'utf8'));
+const toBuffer = (b64) => { const b = Buffer.from(b64, 'base64'); return b.buffer.slice(b.byteOffset, b.byteOffset + b.length); };
+const time = (fn, repeat) => { fn(); const t0 = process.hrtime.bigint(); for (let r = 0; r < repeat; r++) fn(); return Number(process.hrtime.bigint() - t0) / 1e6 / repeat; };
+const out = {};
+for (const [name, c] of Object.entries(data)) {
+  const frames = c.binary.map(toBuffer);
+  out[name] = {
+    json_ms: time(() => { for (const m of c.json) JSON.parse(m); }, c.repeat),
+    binary_ms: time(() => { for (const f of frames) { const d = decodeFrame(f); for (let k = 0; k < d.rows; k++) d.price[k]; } }, c.repeat),
+  };
+}
+console.log(JSON.stringify(out));
+"""
+
+
+def _synthetic(bars, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.choice([-0.001, 0.001], bars))
+    time_ms = 1.7e12 + np.arange(bars) * 60_000.0
+    ema_fast = close + rng.normal(0, 5e-4, bars)
+    ema_slow = close + rng.normal(0, 1e-3, bars)
+    supertrend = close + rng.normal(0, 2e-3, bars)
+    codes = rng.choice(np.array([0, 1, -1], dtype=np.int8), bars, p=[0.96, 0.02, 0.02])
+    return time_ms, close, ema_fast, ema_slow, supertrend, codes
+
+
+def _updates(columns, index):
+    time_ms, close, ema_fast, ema_slow, supertrend, codes = columns
+    labels = {1: 'BUY', -1: 'SELL', 0: ''}
+    return [(i, {
+        'timestamp': str(np.datetime64(int(time_ms[i]), 'ms').astype('datetime64[s]')).replace('T', ' '),
+        'price': float(close[i]),
+        'ema100': float(ema_fast[i]),
+        'ema300': float(ema_slow[i]),
+        'supertrend': float(supertrend[i]),
+        'signal': labels[int(codes[i])],
+    }) for i in index]
+
+
+def _python_parse(json_frames, binary_frames, repeat):
+    def best(fn):
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - t0) / repeat * 1e3
+    return (best(lambda: [json.loads(m) for m in json_frames]),
+            best(lambda: [unpack(f) for f in binary_frames]))
+
+
+def _node_parse(cases):
+    node = shutil.which('node')
+    if node is None:
+        return None
+    payload = {name: {'json': c['json'], 'repeat': c['repeat'],
+                      'binary': [base64.b64encode(f).decode() for f in c['binary']]}
+               for name, c in cases.items()}
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, 'frames.json')
+        script = os.path.join(tmp, 'bench.mjs')
+        with open(data, 'w') as fh:
+            json.dump(payload, fh)
+        with open(script, 'w') as fh:
+            fh.write(_NODE_BENCH % {'decoder': 'file://' + os.path.abspath(FRONTEND_DECODER)})
+        out = subprocess.run([node, '--no-warnings', script, data], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def run(bars=5000, points=500, coalesce=10):
+    columns = _synthetic(bars)
+    json_fmt, binary_fmt = JsonFormat(), BinaryFormat(columns[0], None)
+
+    backfill = _updates(columns, range(bars))
+    tail = _updates(columns, range(bars - coalesce, bars))
+    cases = {
+        'backfill': {'json': json_fmt.encode(backfill),
+                     'binary': [snapshot_frame(*columns, upto=bars, bars=bars, points=points)], 'repeat': 20},
+        'delta x1': {'json': json_fmt.encode(tail[-1:]), 'binary': binary_fmt.encode(tail[-1:]), 'repeat': 20000},
+        f'delta x{coalesce}': {'json': json_fmt.encode(tail), 'binary': binary_fmt.encode(tail), 'repeat': 5000},
+    }
+
+    node = _node_parse(cases)
+    rows = []
+    for name, c in cases.items():
+        py_json, py_binary = _python_parse(c['json'], c['binary'], min(c['repeat'], 2000))
+        rows.append({
+            'case': name,
+            'json_bytes': sum(len(m.encode()) for m in c['json']),
+            'binary_bytes': sum(len(f) for f in c['binary']),
+            'json_messages': len(c['json']),
+            'binary_messages': len(c['binary']),
+            'py_json_ms': py_json,
+            'py_binary_ms': py_binary,
+            'js_json_ms': node[name]['json_ms'] if node else float('nan'),
+            'js_binary_ms': node[name]['binary_ms'] if node else float('nan'),
+        })
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=5000)
+    parser.add_argument('--points', type=int, default=500)
+    parser.add_argument('--coalesce', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'case':>10} {'json B':>9} {'bin B':>8} {'msgs':>9} {'py json ms':>11} {'py bin ms':>10} "
+          f"{'js json ms':>11} {'js bin ms':>10}")
+    for r in run(args.bars, args.points, args.coalesce):
+        print(f"{r['case']:>10} {r['json_bytes']:>9} {r['binary_bytes']:>8} "
+              f"{r['json_messages']:>4}/{r['binary_messages']:<4} {r['py_json_ms']:>11.4f} {r['py_binary_ms']:>10.4f} "
+              f"{r['js_json_ms']:>11.4f} {r['js_binary_ms']:>10.4f}")
@@ -0,0 +1,225 @@
+"""Single-producer fan-out of chart updates to many WebSocket clients.
+
+One producer task computes and encodes every update exactly once and
+pushes the same frame into a bounded queue per subscriber.  A slow
+client never blocks the producer: when its queue is full the oldest frame
+is discarded (``conflate``, the default) or the client is disconnected
+(``drop``).
+
+Subscribers pick a wire *format*.  A format turns each produced batch into
+frames (once per format, shared by all its subscribers), may merge a
+backlog of batches into one coalesced message, and may send a snapshot
+when a client joins.  Lossless formats (deltas that build on each other)
+are never conflated; an overflowing subscriber is resynced with a fresh
+snapshot instead.
+"""
+import asyncio
+import json
+import time
+
+import metrics
+
+CONFLATE = 'conflate'
+DROP = 'drop'
+TEXT = 'text'
+
+# Queue marker: discard the backlog and send a snapshot
+_RESYNC = object()
+
+
+def encode(data):
+    """Compact JSON text, as Starlette's ``send_json`` would produce."""
+    return json.dumps(data, separators=(',', ':'))
+
+
+class TextFormat:
+    """The produced batch already is the frame."""
+
+    lossless = False
+    merge = None
+    snapshot = None
+
+    def encode(self, batch):
+        return [batch]
+
+
+class JsonFormat:
+    """One JSON text frame per update in a batch of ``(key, update)`` pairs."""
+
+    lossless = False
+    merge = None
+    snapshot = None
+
+    def encode(self, batch):
+        return [encode(update) for _, update in batch]
+
+
+class _Subscriber:
+    def __init__(self, queue_size, fmt):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.format = fmt
+        self.kicked = False
+
+
+class BroadcastHub:
+    """Run ``produce()`` every ``interval`` seconds and fan the result out.
+
+    ``produce`` returns a batch for the ``formats`` to encode or ``None`` to
+    skip a tick.  The default single ``text`` format expects the batch to
+    be the encoded frame itself.  With ``produce=None`` there is no tick
+    task and batches arrive through ``publish`` only.
+    """
+
+    def __init__(self, produce, interval=1.0, queue_size=32, policy=CONFLATE, formats=None):
+        if policy not in (CONFLATE, DROP):
+            raise ValueError(f"policy must be '{CONFLATE}' or '{DROP}', got {policy!r}")
+        self.produce = produce
+        self.interval = interval
+        self.queue_size = queue_size
+        self.policy = policy
+        self.formats = formats or {TEXT: TextFormat()}
+        self.subscribers = set()
+        self.stats = {'published': 0, 'delivered': 0, 'conflated': 0, 'coalesced': 0,
+                      'resynced': 0, 'kicked': 0, 'errors': 0}
+        self._task = None
+
+    def start(self):
+        """Start the producer task if it is not running yet."""
+        if self.produce is None:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                batch = self.produce()
+                if batch is not None:
+                    self.publish(batch)
+            except Exception as e:
+                # One bad tick must not end the producer every subscriber depends on
+                self.stats['errors'] += 1
+                print("❌ Broadcast tick failed:", repr(e))
+            # Schedule against a fixed clock so ticks do not drift with load
+            next_tick += self.interval
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    def publish(self, batch):
+        """Queue ``batch`` for every subscriber without waiting on any of them."""
+        with metrics.stage('ws_publish', items=len(self.subscribers)):
+            self._publish(batch)
+
+    def _publish(self, batch):
+        self.stats['published'] += 1
+        frames = {}
+        published = time.perf_counter_ns()
+        for sub in list(self.subscribers):
+            if sub.format not in frames:
+                frames[sub.format] = self.formats[sub.format].encode(batch)
+            item = (batch, frames[sub.format], published)
+            try:
+                sub.queue.put_nowait(item)
+                continue
+            except asyncio.QueueFull:
+                pass
+            if self.policy == DROP:
+                self._kick(sub)
+            elif self.formats[sub.format].lossless:
+                self._reset(sub, _RESYNC)
+                self.stats['resynced'] += 1
+            else:
+                sub.queue.get_nowait()
+                sub.queue.put_nowait(item)
+                self.stats['conflated'] += 1
+
+    def resync(self):
+        """Make every subscriber of a lossless format start over from a snapshot."""
+        for sub in list(self.subscribers):
+            if self.formats[sub.format].lossless:
+                self._reset(sub, _RESYNC)
+
+    def _reset(self, sub, marker):
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(marker)
+
+    def _kick(self, sub):
+        self.subscribers.discard(sub)
+        sub.kicked = True
+        self._reset(sub, None)
+        self.stats['kicked'] += 1
+
+    def subscribe(self, fmt=TEXT):
+        if fmt not in self.formats:
+            raise ValueError(f"unknown format {fmt!r}, expected one of {sorted(self.formats)}")
+        self.start()
+        sub = _Subscriber(self.queue_size, fmt)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        self.subscribers.discard(sub)
+
+    async def _send(self, websocket, frames):
+        for frame in frames:
+            with metrics.stage('ws_send'):
+                if isinstance(frame, bytes):
+                    await websocket.send_bytes(frame)
+                else:
+                    await websocket.send_text(frame)
+            self.stats['delivered'] += 1
+
+    async def serve(self, websocket, fmt=TEXT, **snapshot_args):
+        """Stream frames to an accepted ``websocket`` until it goes away.
+
+        Formats with a snapshot send it first (built with ``snapshot_args``);
+        whatever queued up while a frame was being sent goes out as one
+        coalesced message when the format can merge batches.
+        """
+        sub = self.subscribe(fmt)
+        fmt = self.formats[fmt]
+        try:
+            # Subscribed before the snapshot is taken, so no batch falls in between
+            if fmt.snapshot is not None:
+                await self._send(websocket, fmt.snapshot(**snapshot_args))
+            while True:
+                items = [await sub.queue.get()]
+                while not sub.queue.empty():
+                    items.append(sub.queue.get_nowait())
+                if items[0] is None:
+                    await websocket.close(code=1013)  # try again later
+                    return
+                if items[0] is _RESYNC:
+                    # Everything still queued is already part of the new snapshot
+                    await self._send(websocket, fmt.snapshot(**snapshot_args))
+                    continue
+                if len(items) > 1 and fmt.merge is not None:
+                    frames = fmt.encode(fmt.merge([batch for batch, _, _ in items]))
+                    self.stats['coalesced'] += len(items) - 1
+                else:
+                    frames = [frame for _, item_frames, _ in items for frame in item_frames]
+                await self._send(websocket, frames)
+                # Publish-to-sent latency, including time spent queued behind this client
+                now = time.perf_counter_ns()
+                for _, _, published in items:
+                    metrics.record('ws_delivery', now - published)
+        except Exception as e:
+            print("❌ Client disconnected:", e)
+        finally:
+            self.unsubscribe(sub)
+            if not sub.kicked:
+                try:
+                    await websocket.close()
+                except Exception:
+                    pass
@@ -0,0 +1,166 @@
+"""Indexed, paginated access to historical bricks and signals.
+
+Brick timestamps are append-only and sorted, so a time range maps to a
+brick slice with two ``np.searchsorted`` calls; signal positions are kept
+as their own sorted index array and sliced the same way.  Responses are
+memoised in a small LRU that is cleared whenever new bricks are picked up.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+import numpy as np
+
+from signals import BUY, ST_CURR, compute_signals
+
+MAX_LIMIT = 10_000
+CACHE_SIZE = 256
+
+
+def _to_ns(value):
+    if value is None:
+        return None
+    import pandas as pd  # deferred: the backend imports this module before pandas is loaded
+    return pd.Timestamp(value).as_unit('ns').value
+
+
+def _timestamps(ns):
+    text = np.datetime_as_string(np.asarray(ns).view('datetime64[ns]'), unit='s')
+    return [t.replace('T', ' ') for t in text.tolist()]
+
+
+def _floats(values):
+    # JSON has no NaN; warm-up values go out as null
+    return [None if x != x else x for x in np.asarray(values, dtype=np.float64).tolist()]
+
+
+class HistoryIndex:
+    """Range/cursor queries over brick columns returned by ``load()``.
+
+    ``load`` returns a dict of equally long arrays: ``Date`` (int64 ns),
+    ``Open``/``High``/``Low``/``Close``, ``EMA_fast``/``EMA_slow`` and ``ST``.
+    It is called again by ``refresh`` (at most every ``refresh_interval``
+    seconds) to pick up bricks appended since the last load.  Queries and
+    refreshes are serialised by a lock so the index can be shared by the
+    server's worker threads.
+    """
+
+    def __init__(self, load, signal_start=301, refresh_interval=1.0):
+        self.load = load
+        self.signal_start = signal_start
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self.rows = 0
+        self._cache = OrderedDict()
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._set(load())
+
+    def _set(self, columns):
+        self.columns = columns
+        self.times = np.asarray(columns['Date'])
+        self.rows = self.times.size
+        codes = compute_signals(columns['Open'], columns['High'], columns['Low'], columns['Close'],
+                                columns['EMA_fast'], columns['EMA_slow'], columns['ST'],
+                                st_bar=ST_CURR, start=self.signal_start)
+        self.signal_index = np.flatnonzero(codes)
+        self.signal_codes = codes[self.signal_index]
+        self.version += 1
+        self._cache.clear()
+
+    def refresh(self, force=False):
+        """Reload if due; returns True when new bricks were added."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked < self.refresh_interval:
+                return False
+            self._checked = now
+            columns = self.load()
+            if len(columns['Date']) == self.rows:
+                return False
+            self._set(columns)
+            return True
+
+    def _range(self, start, end):
+        lo = 0 if start is None else int(np.searchsorted(self.times, _to_ns(start), side='left'))
+        hi = self.rows if end is None else int(np.searchsorted(self.times, _to_ns(end), side='left'))
+        return lo, max(lo, hi)
+
+    def _cached(self, key, compute):
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+            result = compute()
+            self._cache[key] = result
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return result
+
+    def bricks(self, start=None, end=None, cursor=None, limit=1000, points=None):
+        """Bricks with ``start <= Date < end``.
+
+        Pages of ``limit`` bricks are chained through ``next_cursor``; with
+        ``points`` the whole range is instead decimated to at most that
+        many evenly spaced bricks (always keeping the last one).
+        """
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        key = ('bricks', start, end, cursor, limit, points)
+        return self._cached(key, lambda: self._bricks(start, end, cursor, limit, points))
+
+    def _bricks(self, start, end, cursor, limit, points):
+        lo, hi = self._range(start, end)
+        total = hi - lo
+        next_cursor = None
+        if points:
+            points = max(1, int(points))
+            if total > points:
+                idx = np.unique(np.linspace(lo, hi - 1, points).round().astype(np.int64))
+            else:
+                idx = np.arange(lo, hi)
+        else:
+            first = lo if cursor is None else max(lo, int(cursor))
+            last = min(hi, first + limit)
+            idx = slice(first, last)
+            next_cursor = last if last < hi else None
+
+        c = self.columns
+        return {
+            'count': total,
+            'next_cursor': next_cursor,
+            'bricks': {
+                'timestamp': _timestamps(c['Date'][idx]),
+                'open': _floats(c['Open'][idx]),
+                'high': _floats(c['High'][idx]),
+                'low': _floats(c['Low'][idx]),
+                'close': _floats(c['Close'][idx]),
+                'ema_fast': _floats(c['EMA_fast'][idx]),
+                'ema_slow': _floats(c['EMA_slow'][idx]),
+                'supertrend': _floats(c['ST'][idx]),
+            },
+        }
+
+    def signals(self, start=None, end=None, cursor=None, limit=1000):
+        """BUY/SELL signals on bricks with ``start <= Date < end``, paginated."""
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        key = ('signals', start, end, cursor, limit)
+        return self._cached(key, lambda: self._signals(start, end, cursor, limit))
+
+    def _signals(self, start, end, cursor, limit):
+        lo, hi = self._range(start, end)
+        s_lo = int(np.searchsorted(self.signal_index, lo, side='left'))
+        s_hi = int(np.searchsorted(self.signal_index, hi, side='left'))
+        first = s_lo if cursor is None else max(s_lo, int(np.searchsorted(self.signal_index, int(cursor), side='left')))
+        last = min(s_hi, first + limit)
+        idx = self.signal_index[first:last]
+        codes = self.signal_codes[first:last]
+        return {
+            'count': s_hi - s_lo,
+            'next_cursor': int(self.signal_index[last]) if last < s_hi else None,
+            'signals': [
+                {'type': 'BUY' if code == BUY else 'SELL', 'price': price, 'time': ts}
+                for code, price, ts in zip(codes.tolist(), self.columns['Close'][idx].tolist(),
+                                           _timestamps(self.columns['Date'][idx]))
+            ],
+        }
@@ -0,0 +1,118 @@
+"""Load test for the ``/ws/chart`` broadcast hub.
+
+Starts ``uvicorn main:app`` in a subprocess with a fast tick interval, then
+connects increasing numbers of WebSocket clients and measures, per level:
+
+* delivery   - share of produced frames each client actually received
+* spread     - per frame, time between the first and last client receiving it
+               (p50 / p99 / max), i.e. how far clients drift apart
+
+A level is "sustained" when every client received at least 95 % of the
+frames and the p99 spread stays below one tick interval.
+
+The server needs enough bricks to replay (more than 301), so point
+``--data-dir`` at a directory whose ``EURUSD_1min.csv`` is large enough.
+
+Usage::
+
+    python loadtest_ws.py --data-dir /path/to/data --clients 10,100,500 --interval 0.05
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+async def _client(url, arrivals, stop):
+    async with websockets.connect(url, max_queue=None) as ws:
+        while not stop.is_set():
+            try:
+                frame = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            arrivals.append((frame, time.perf_counter()))
+
+
+async def run_level(url, clients, duration, interval):
+    stop = asyncio.Event()
+    arrivals = [[] for _ in range(clients)]
+    tasks = [asyncio.create_task(_client(url, arrivals[k], stop)) for k in range(clients)]
+    await asyncio.sleep(1.0)  # let every client connect and settle
+    for a in arrivals:
+        a.clear()
+    start = time.perf_counter()
+    await asyncio.sleep(duration)
+    end = time.perf_counter()
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    frames = {}
+    for per_client in arrivals:
+        for frame, t in per_client:
+            if start <= t <= end:
+                frames.setdefault(frame, []).append(t)
+    # Only frames produced well inside the window are complete across clients
+    expected = max(1, int(duration / interval) - 2)
+    counts = np.array([sum(start <= t <= end for _, t in a) for a in arrivals])
+    spreads = np.array([max(ts) - min(ts) for ts in frames.values() if len(ts) == clients] or [np.nan])
+    delivery = counts.min() / expected
+    return {
+        'clients': clients,
+        'frames': len(frames),
+        'min_delivery': min(delivery, 1.0),
+        'spread_p50_ms': float(np.nanpercentile(spreads, 50) * 1e3),
+        'spread_p99_ms': float(np.nanpercentile(spreads, 99) * 1e3),
+        'spread_max_ms': float(np.nanmax(spreads) * 1e3) if np.isfinite(spreads).any() else float('nan'),
+        'sustained': bool(delivery >= 0.95 and np.nanpercentile(spreads, 99) < interval),
+    }
+
+
+async def main(args):
+    url = f"ws://127.0.0.1:{args.port}/ws/chart"
+    env = dict(os.environ, CHART_INTERVAL=str(args.interval), PYTHONPATH=HERE)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(args.port), '--log-level', 'warning'],
+        cwd=args.data_dir or HERE, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        # The server accepts connections before its data is loaded; wait for /readyz
+        for _ in range(300):
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{args.port}/readyz", timeout=1):
+                    break
+            except OSError:
+                await asyncio.sleep(0.2)
+        else:
+            raise SystemExit("Server did not become ready")
+
+        print(f"{'clients':>8} {'frames':>7} {'delivery':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}  sustained")
+        best = 0
+        for clients in args.clients:
+            r = await run_level(url, clients, args.duration, args.interval)
+            print(f"{r['clients']:>8} {r['frames']:>7} {r['min_delivery']:>9.1%} {r['spread_p50_ms']:>8.2f} "
+                  f"{r['spread_p99_ms']:>8.2f} {r['spread_max_ms']:>8.2f}  {r['sustained']}")
+            if r['sustained']:
+                best = clients
+        print(f"Sustained up to {best} concurrent clients at {1 / args.interval:.0f} frames/s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default=None, help="directory containing EURUSD_1min.csv")
+    parser.add_argument('--clients', default='10,50,100,250,500',
+                        type=lambda s: [int(x) for x in s.split(',')])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=0.05)
+    parser.add_argument('--port', type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
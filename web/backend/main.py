@@ -1,11 +1,44 @@
 import asyncio
-import datetime
-import pandas as pd
-import pandas_ta as ta
-from fastapi import FastAPI, WebSocket
+import contextlib
+import os
+import sys
+import time
+import traceback
+from fastapi import FastAPI, HTTPException, Query, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-app = FastAPI(title="📊 cTrader EMA + Supertrend Bot")
+# Only light modules here; pandas and everything built on it load in the
+# background warm-up so the server accepts connections straight away
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'python'))
+import metrics
+metrics.enable(os.environ.get("METRICS", "1") != "0")  # served on /metrics; METRICS=0 turns timing off
+from broadcast import CONFLATE
+from history import MAX_LIMIT, HistoryIndex
+from streams import ChartStream, StreamCache, key_params, stream_key
+from execution import ExecutionEngine, SimulatedBroker
+
+WARMUP_RETRY_S = float(os.environ.get("WARMUP_RETRY_S", "5"))
+
+STARTED = time.monotonic()
+warmup = {"state": "starting", "error": None, "seconds": None, "attempts": 0}
+ready = asyncio.Event()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(warm_up())
+    yield
+    task.cancel()
+    for t in replays:
+        t.cancel()
+    if runner is not None:
+        await runner.stop()
+    await streams.close()
+    await paper.stop()
+
+
+app = FastAPI(title="📊 cTrader EMA + Supertrend Bot", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,84 +48,279 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def renko_df(df, brick_size=0.001):
-    df_renko = pd.DataFrame(columns=['Date','Open','High','Low','Close'])
-    last_close = df['Close'].iloc[0]
-    open_price = last_close
-    for i, row in df.iterrows():
-        price = row['Close']
-        while abs(price - last_close) >= brick_size:
-            direction = 1 if price > last_close else -1
-            close_price = last_close + direction * brick_size
-            high = max(last_close, close_price)
-            low = min(last_close, close_price)
-            new_row = pd.DataFrame({
-                'Date':[row['Date']],
-                'Open':[open_price],
-                'High':[high],
-                'Low':[low],
-                'Close':[close_price]
-            })
-            df_renko = pd.concat([df_renko, new_row], ignore_index=True)
-            last_close = close_price
-            open_price = last_close
-    return df_renko
-
-# Preload CSV once
-df = pd.read_csv("EURUSD_1min.csv", parse_dates=['Date'])
-renko = renko_df(df)
-renko['EMA100'] = ta.ema(renko['Close'], length=100)
-renko['EMA300'] = ta.ema(renko['Close'], length=300)
-st = ta.supertrend(renko['High'], renko['Low'], renko['Close'], length=2, multiplier=30)
-renko['ST'] = st[st.columns[-1]]
+RENKO_PARAMS = dict(brick_size=0.001, fast_length=100, slow_length=300, st_length=2, st_multiplier=30)
+
+# Price data: a CSV, or a directory converted once with ``python ingest.py <csv> <dir>`` (no parsing on load)
+CHART_SOURCE = os.environ.get("CHART_SOURCE", "EURUSD_1min.csv")
+
+DEFAULT_STREAM = stream_key(**RENKO_PARAMS)
+
+# Filled in during warm-up
+history = chart = runner = symbol_config = None
+
+# Paper trading on the live feed: the cBot's orders against a simulated broker
+paper = ExecutionEngine(SimulatedBroker(
+    latency_ms=float(os.environ.get("PAPER_LATENCY_MS", "50")),
+    slippage_pips=float(os.environ.get("PAPER_SLIPPAGE_PIPS", "0.2")),
+))
+
+# Every emitted brick is journaled per cached parameter set (an evicted setting's journal is deleted),
+# so a restart resumes where it stopped; "" turns it off
+JOURNAL_DIR = os.environ.get("CHART_JOURNAL_DIR", ".journal")
+
+def journal_path(key):
+    if not JOURNAL_DIR:
+        return None
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    return os.path.join(JOURNAL_DIR, "chart-{:g}-{}-{}-{}-{:g}.jnl".format(*key))
+
+def make_stream(key):
+    """Chart stream for a parameter set; paper trading follows the default one."""
+    return ChartStream(
+        CHART_SOURCE, key_params(key),
+        interval=float(os.environ.get("CHART_INTERVAL", "1.0")),
+        queue_size=int(os.environ.get("CHART_QUEUE_SIZE", "32")),
+        policy=os.environ.get("CHART_SLOW_CLIENT_POLICY", CONFLATE),
+        bricks_per_tick=int(os.environ.get("CHART_BRICKS_PER_TICK", "1")),
+        # The bars clients have been sent, for binary snapshots; fixed size however long the feed runs
+        history=int(os.environ.get("CHART_HISTORY", "5000")),
+        on_bar=(lambda *bar: paper.on_bar("EURUSD", *bar)) if key == DEFAULT_STREAM else None,
+        journal=journal_path(key),
+    )
+
+# One stream per distinct parameter set clients ask for, at most STREAM_CACHE_SIZE of them
+streams = StreamCache(make_stream, size=int(os.environ.get("STREAM_CACHE_SIZE", "8")))
+
+def load_chart_data():
+    """Time-indexed view of the default bricks for the REST history endpoints; picks up appended bricks."""
+    global history
+    from renko_cache import open_cached
+
+    index = HistoryIndex(lambda: open_cached(CHART_SOURCE, **RENKO_PARAMS), signal_start=301)
+    index.refresh(force=True)
+    history = index
+
+async def warm_up():
+    """Load data off the event loop, then the default stream and runner; retries until it succeeds."""
+    global chart
+    while True:
+        warmup["state"] = "warming_up"
+        warmup["attempts"] += 1
+        t0 = time.perf_counter()
+        try:
+            await asyncio.to_thread(load_chart_data)
+            await asyncio.to_thread(load_symbols)
+            # Pinned, so it stays cached however many other settings clients ask for
+            chart = await streams.acquire(DEFAULT_STREAM, pin=True)
+            await streams.release(DEFAULT_STREAM)
+            # Paper trading consumes the default stream whether or not a dashboard is watching it
+            chart.hub.start()
+            if len(chart) <= chart.start:
+                print(f"⚠️ Paper trading idle: {paper_idle_reason()}")
+        except Exception as e:
+            warmup.update(state="failed", error=f"{type(e).__name__}: {e}")
+            if warmup["attempts"] == 1:
+                traceback.print_exc()
+            else:
+                print(f"warm-up attempt {warmup['attempts']} failed: {warmup['error']}")
+            await asyncio.sleep(WARMUP_RETRY_S)
+            continue
+        warmup.update(state="ready", error=None, seconds=time.perf_counter() - t0)
+        ready.set()
+        return
+
+def paper_idle_reason():
+    """Why paper trading never sees a bar, or ``None`` if the default stream has enough bricks."""
+    if chart is None or len(chart) > chart.start:
+        return None
+    return (f"the default stream has {len(chart)} bricks at brick_size {RENKO_PARAMS['brick_size']}; "
+            f"the slow EMA needs more than {chart.start}")
+
+def require_ready():
+    if not ready.is_set():
+        raise HTTPException(status_code=503, detail=warmup["state"], headers={"Retry-After": "1"})
+
+async def wait_ready(websocket):
+    """Hold an accepted socket until warm-up is done, telling the client it is warming up."""
+    if not ready.is_set():
+        await websocket.send_json({"status": "warming_up"})
+        await ready.wait()
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok", "uptime_s": time.monotonic() - STARTED}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 once data and indicators are loaded, 503 while warming up or failing."""
+    body = {"status": warmup["state"], "warmup": warmup}
+    return JSONResponse(body, status_code=200 if ready.is_set() else 503)
 
 # Generate signals
-def get_signals():
-    signals = []
-    for i in range(301, len(renko)):
-        prev = renko.iloc[i-1]
-        curr = renko.iloc[i]
-
-        # Buy
-        if curr['ST'] < curr['Close'] and prev['EMA100'] > prev['EMA300'] and prev['Low'] < prev['EMA300'] and curr['Close'] > curr['Open']:
-            signals.append({"type":"BUY","price":curr['Close'],"time":str(curr['Date'])})
-        # Sell
-        elif curr['ST'] > curr['Close'] and prev['EMA100'] < prev['EMA300'] and prev['High'] > prev['EMA300'] and curr['Close'] < curr['Open']:
-            signals.append({"type":"SELL","price":curr['Close'],"time":str(curr['Date'])})
-    return signals
+def get_signals(start=None, end=None):
+    history.refresh()
+    signals, cursor = [], None
+    while True:
+        page = history.signals(start, end, cursor, MAX_LIMIT)
+        signals += page["signals"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return signals
+
+@app.get("/api/signals")
+def signals_endpoint(
+    start: str | None = None,
+    end: str | None = None,
+    cursor: int | None = None,
+    limit: int = Query(1000, ge=1, le=MAX_LIMIT),
+):
+    """Signals with ``start <= time < end``; follow ``next_cursor`` for more."""
+    require_ready()
+    history.refresh()
+    try:
+        return history.signals(start, end, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/bricks")
+def bricks_endpoint(
+    start: str | None = None,
+    end: str | None = None,
+    cursor: int | None = None,
+    limit: int = Query(1000, ge=1, le=MAX_LIMIT),
+    points: int | None = Query(None, ge=1, le=MAX_LIMIT),
+):
+    """Columnar bricks + indicators for a time range, paged or decimated to ``points``."""
+    require_ready()
+    history.refresh()
+    try:
+        return history.bricks(start, end, cursor, limit, points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics")
+def metrics_endpoint(format: str = "json"):
+    """Per-stage latency (p50/p99/max) and throughput; ``?format=prometheus`` for scraping."""
+    if format == "prometheus":
+        return PlainTextResponse(metrics.prometheus_text())
+    return dict(metrics.snapshot(), warmup=warmup, chart=chart.hub.stats if chart is not None else None,
+                streams=streams.stats())
+
+@app.get("/streams")
+def streams_endpoint():
+    """Cached chart streams per parameter set, with hit rate and evictions."""
+    return streams.stats()
+
+@app.get("/paper")
+def paper_endpoint(trades: int = Query(20, ge=0, le=1000)):
+    """Paper-trading positions, P&L, order latency and the most recent closed trades.
+
+    409 when the default series is too short for the strategy to ever trade
+    (the bundled sample CSV is: 89 bricks at 0.001 against a 301-brick warm-up)."""
+    require_ready()
+    idle = paper_idle_reason()
+    if idle is not None:
+        raise HTTPException(status_code=409, detail=f"paper trading has no bars: {idle}")
+    recent = list(paper.trades)[-trades:] if trades else []
+    return dict(paper.stats(), positions=[
+        {"id": p.id, "side": p.side, "entry_price": p.entry_price, "stop_price": p.stop_price}
+        for p in paper.positions.values()
+    ], trades=recent)
 
 @app.websocket("/ws/chart")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    protocol: str = "json",
+    bars: int = 500,
+    points: int = 500,
+    brick_size: float = RENKO_PARAMS["brick_size"],
+    fast: int = RENKO_PARAMS["fast_length"],
+    slow: int = RENKO_PARAMS["slow_length"],
+    st_length: int = RENKO_PARAMS["st_length"],
+    st_multiplier: float = RENKO_PARAMS["st_multiplier"],
+):
+    """Chart stream: one JSON message per brick, or with ``?protocol=binary``
+    a packed snapshot of the last ``bars`` bars followed by binary deltas.
+
+    ``brick_size``, ``fast``/``slow`` (EMA lengths), ``st_length`` and
+    ``st_multiplier`` pick the series; clients with the same settings share
+    one cached stream."""
     await websocket.accept()
     print("📡 WebSocket Connected")
-    i = 301
     try:
-        while True:
-            if i >= len(renko):
-                i = 301  # loop for demo
-            prev = renko.iloc[i-1]
-            curr = renko.iloc[i]
-
-            # Determine signal
-            signal = ""
-            if curr['ST'] < curr['Close'] and prev['EMA100'] > prev['EMA300'] and prev['Low'] < prev['EMA300'] and curr['Close'] > curr['Open']:
-                signal = "BUY"
-            elif curr['ST'] > curr['Close'] and prev['EMA100'] < prev['EMA300'] and prev['High'] > prev['EMA300'] and curr['Close'] < curr['Open']:
-                signal = "SELL"
-
-            data = {
-                "timestamp": str(curr['Date']),
-                "price": float(curr['Close']),
-                "ema100": float(curr['EMA100']),
-                "ema300": float(curr['EMA300']),
-                "supertrend": float(curr['ST']),
-                "signal": signal
-            }
-
-            await websocket.send_json(data)
-            i += 1
-            await asyncio.sleep(1)
+        key = stream_key(brick_size, fast, slow, st_length, st_multiplier)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))  # invalid parameters
+        return
+    await wait_ready(websocket)
+    try:
+        stream = await streams.acquire(key)
     except Exception as e:
-        print("❌ Client disconnected:", e)
+        print("❌ Chart stream failed to load:", e)
+        await websocket.close(code=1011)
+        return
+    if stream is None:
+        await websocket.close(code=1013)  # every cached setting is in use; try again later
+        return
+    try:
+        if len(stream) <= stream.start:
+            # Too few bricks to warm up the slow EMA: the stream would never send anything
+            detail = f"{len(stream)} bricks at brick_size {key[0]}; the slow EMA needs more than {stream.start}"
+            await websocket.send_json({"status": "insufficient_data", "detail": detail})
+            await websocket.close(code=1008, reason=detail)
+            return
+        if protocol == "binary":
+            await stream.hub.serve(websocket, "binary", bars=max(1, bars), points=max(1, points))
+        else:
+            await stream.hub.serve(websocket, "json")
     finally:
-        await websocket.close()
+        await streams.release(key)
+
+
+# -------------------- Multi-symbol runner --------------------
+# SYMBOLS_CONFIG points at {"GBPUSD": {"path": "GBPUSD_1min.csv", "brick_size": 0.001, ...}, ...};
+# each symbol with a "path" is replayed rows_per_tick rows per CHART_INTERVAL.
+replays = []
+
+def load_symbols():
+    global runner, symbol_config
+    from symbols import SymbolRunner, load_config
+
+    symbol_config = (
+        load_config(os.environ["SYMBOLS_CONFIG"]) if os.environ.get("SYMBOLS_CONFIG")
+        else {"EURUSD": dict(path=CHART_SOURCE, **RENKO_PARAMS)}
+    )
+    runner = SymbolRunner.from_config(
+        symbol_config,
+        workers=int(os.environ["SYMBOL_WORKERS"]) if os.environ.get("SYMBOL_WORKERS") else None,
+        queue_size=int(os.environ.get("CHART_QUEUE_SIZE", "32")),
+        policy=os.environ.get("CHART_SLOW_CLIENT_POLICY", CONFLATE),
+    )
+
+async def start_runner():
+    if replays:
+        return
+    await runner.start()
+    interval = float(os.environ.get("CHART_INTERVAL", "1.0"))
+    for symbol, spec in symbol_config.items():
+        if spec.get("path"):
+            replays.append(asyncio.create_task(
+                runner.replay_csv(symbol, spec["path"], spec.get("rows_per_tick", 60), interval)))
+
+@app.get("/symbols")
+def symbols_endpoint():
+    """Per-symbol progress, backlog and pool time."""
+    require_ready()
+    return runner.stats()
+
+@app.websocket("/ws/symbols/{symbol}")
+async def symbol_websocket(websocket: WebSocket, symbol: str):
+    """Bricks, indicators and signals for one symbol as they are computed."""
+    await websocket.accept()
+    await wait_ready(websocket)
+    if symbol not in runner.symbols:
+        await websocket.close(code=1008)  # unknown symbol
+        return
+    await start_runner()
+    await runner.serve(symbol, websocket)
@@ -0,0 +1,120 @@
+"""Binary snapshot + delta frames for the ``/ws/chart`` stream.
+
+Every frame is a little-endian columnar block::
+
+    u8  kind        1 = SNAPSHOT (replace the chart), 2 = DELTA (append)
+    u8  version
+    u16 reserved
+    u32 rows
+    f64 time[rows]        epoch milliseconds
+    f32 price[rows]
+    f32 ema_fast[rows]
+    f32 ema_slow[rows]
+    f32 supertrend[rows]  NaN during warm-up
+    i8  signal[rows]      1 = BUY, -1 = SELL, 0 = none
+
+Column offsets stay aligned to their element size, so a browser can wrap
+each one in a typed array over the received ``ArrayBuffer`` without copying.
+A client starts with a SNAPSHOT of the last bars (decimated to a point
+budget, keeping every signal bar) and then only receives DELTAs; several
+bricks landing in one tick, or a backlog behind a slow socket, travel as
+one multi-row DELTA.
+"""
+import struct
+
+import numpy as np
+
+from signals import BUY, HOLD, SELL
+
+SNAPSHOT = 1
+DELTA = 2
+VERSION = 1
+
+_HEADER = struct.Struct('<BBHI')
+_FLOAT_COLUMNS = ('price', 'ema_fast', 'ema_slow', 'supertrend')
+_SIGNAL_CODES = {'BUY': BUY, 'SELL': SELL}
+
+
+def pack(kind, time_ms, price, ema_fast, ema_slow, supertrend, signal):
+    """Encode equally long columns as one frame."""
+    rows = len(time_ms)
+    parts = [_HEADER.pack(kind, VERSION, 0, rows), np.asarray(time_ms, dtype='<f8').tobytes()]
+    parts += [np.asarray(c, dtype='<f4').tobytes() for c in (price, ema_fast, ema_slow, supertrend)]
+    parts.append(np.asarray(signal, dtype='i1').tobytes())
+    return b''.join(parts)
+
+
+def unpack(frame):
+    """Decode a frame into ``(kind, columns)``; arrays are views on ``frame``."""
+    kind, version, _, rows = _HEADER.unpack_from(frame)
+    if version != VERSION:
+        raise ValueError(f"unsupported frame version {version}")
+    offset = _HEADER.size
+    columns = {'time': np.frombuffer(frame, '<f8', rows, offset)}
+    offset += 8 * rows
+    for name in _FLOAT_COLUMNS:
+        columns[name] = np.frombuffer(frame, '<f4', rows, offset)
+        offset += 4 * rows
+    columns['signal'] = np.frombuffer(frame, 'i1', rows, offset)
+    return kind, columns
+
+
+def decimate(lo, hi, points, keep=None):
+    """Indices of at most about ``points`` bars in ``[lo, hi)`` plus ``keep``.
+
+    Samples sit on absolute bar numbers so successive snapshots line up;
+    the last bar and every index in ``keep`` (signal bars) are always kept.
+    """
+    if hi - lo <= points:
+        return np.arange(lo, hi)
+    stride = -(-(hi - lo) // points)
+    idx = np.arange(lo + (-lo) % stride, hi, stride)
+    extra = [np.array([hi - 1])]
+    if keep is not None:
+        extra.append(np.asarray(keep))
+    return np.union1d(idx, np.concatenate(extra))
+
+
+class BinaryFormat:
+    """``BroadcastHub`` format sending a snapshot and then binary deltas.
+
+    ``time_ms`` maps a brick index to its timestamp; batches are lists of
+    ``(index, update)`` pairs as produced for the JSON stream.  ``snapshot``
+    is called as ``snapshot(bars=..., points=...)`` and returns its frames.
+    """
+
+    lossless = True
+
+    def __init__(self, time_ms, snapshot):
+        self.time_ms = time_ms
+        self.snapshot = snapshot
+
+    def encode(self, batch):
+        if not batch:
+            return []
+        index = [i for i, _ in batch]
+        updates = [u for _, u in batch]
+        return [pack(
+            DELTA, self.time_ms[index],
+            [u['price'] for u in updates],
+            [u['ema100'] for u in updates],
+            [u['ema300'] for u in updates],
+            [u['supertrend'] for u in updates],
+            [_SIGNAL_CODES.get(u['signal'], HOLD) for u in updates],
+        )]
+
+    @staticmethod
+    def merge(batches):
+        return [pair for batch in batches for pair in batch]
+
+
+def snapshot_frame(time_ms, close, ema_fast, ema_slow, supertrend, codes, upto, bars=500, points=500, first=0):
+    """SNAPSHOT of bars ``upto - bars .. upto - 1``, decimated to ``points``.
+
+    The columns are indexed by bar number; ``first`` is the oldest bar they
+    hold (ring buffer columns drop older ones).
+    """
+    lo = max(first, upto - bars)
+    keep = lo + np.flatnonzero(np.asarray(codes[lo:upto]))
+    idx = decimate(lo, upto, max(1, points), keep)
+    return pack(SNAPSHOT, time_ms[idx], close[idx], ema_fast[idx], ema_slow[idx], supertrend[idx], codes[idx])
@@ -0,0 +1,390 @@
+"""Chart streams per parameter set, shared through a bounded LRU cache.
+
+A ``ChartStream`` replays the bricks of one parameter set - brick size,
+EMA lengths and Supertrend length/multiplier - through its own indicator
+engine and fans the updates out with its own ``BroadcastHub``.  Every
+client asking for the same parameters is served by the same stream, so
+each setting is computed once however many clients watch it.
+
+``StreamCache`` keeps at most ``size`` streams in least-recently-used
+order.  A miss builds the stream off the event loop (``open_cached``
+memory-maps the bricks and indicators, building them on disk the first
+time); concurrent requests for the same key wait on the one build.  To
+make room it evicts the least recently used stream nobody is watching,
+closes it and deletes its files on disk (``.renko_cache`` entry and
+journal), so they stay bounded by the cache size like the streams are.
+Pinned streams (the server default) are never evicted, and when every
+cached stream is in use a new key is refused instead of letting the cache
+grow.
+
+With a ``journal`` path a stream appends every brick it emits, with its
+indicators and signal, to a ``journal.Journal``.  A stream built over an
+existing journal resumes after the last journaled brick - from the
+checkpointed indicator engine plus the few records written since - rather
+than starting the replay over.  An evicted stream's journal is deleted
+with it, so only settings still cached (and the pinned default) keep one.
+"""
+import asyncio
+import collections
+import copy
+import os
+
+import numpy as np
+
+import metrics
+from broadcast import CONFLATE, BroadcastHub, JsonFormat
+from protocol import BinaryFormat, snapshot_frame
+from journal import Journal
+from ringbuffer import RingBuffer
+from signals import BUY, SELL
+
+SIGNAL_CODES = {"BUY": BUY, "SELL": SELL}
+
+BRICK_DECIMALS = 5  # brick sizes on a grid of a tenth of a pip (5-digit quotes)
+MIN_BRICK_SIZE = 1e-5
+MAX_LENGTH = 5000
+
+
+def stream_key(brick_size=0.001, fast_length=100, slow_length=300, st_length=2, st_multiplier=30):
+    """Validated, normalised cache key for a parameter set; ``ValueError`` if out of range.
+
+    Brick sizes are rounded to ``BRICK_DECIMALS`` so near-identical floats
+    share one stream and one on-disk cache entry.
+    """
+    brick_size, st_multiplier = round(float(brick_size), BRICK_DECIMALS), float(st_multiplier)
+    fast_length, slow_length, st_length = int(fast_length), int(slow_length), int(st_length)
+    if not brick_size >= MIN_BRICK_SIZE:
+        raise ValueError(f"brick_size must be at least {MIN_BRICK_SIZE}")
+    for name, length in (("fast", fast_length), ("slow", slow_length), ("st_length", st_length)):
+        if not 1 <= length <= MAX_LENGTH:
+            raise ValueError(f"{name} must be between 1 and {MAX_LENGTH}")
+    if not 0 < st_multiplier <= 1000:
+        raise ValueError("st_multiplier must be in (0, 1000]")
+    return brick_size, fast_length, slow_length, st_length, st_multiplier
+
+
+def key_params(key):
+    return dict(zip(("brick_size", "fast_length", "slow_length", "st_length", "st_multiplier"), key))
+
+
+def _timestamp(ns):
+    return str(np.datetime64(int(ns), "ns").astype("datetime64[s]")).replace("T", " ")
+
+
+class ChartStream:
+    """Looping replay of one parameter set's bricks to its WebSocket clients.
+
+    Replay starts once the slow EMA has warmed up (``slow_length + 1``).
+    The last ``history`` bars sent are kept in a ring for binary snapshots.
+    ``on_bar(close, high, low, supertrend, signal)`` is called for every
+    replayed brick.  Updates keep the ``ema100``/``ema300`` keys whatever
+    the lengths, so clients read every stream the same way.
+    """
+
+    def __init__(self, path, params, interval=1.0, queue_size=32, policy=CONFLATE, bricks_per_tick=1,
+                 history=5000, on_bar=None, journal=None):
+        self.path = path
+        self.params = params
+        self.journal_path = journal
+        self.journal = None
+        self.start = params["slow_length"] + 1
+        self.bricks_per_tick = bricks_per_tick
+        self.on_bar = on_bar
+        self.columns = None
+        self.i = self.start
+        self.engine = self.prev = None
+        self._primed = None
+        self.restarts = 0
+        self.recent = RingBuffer(history, [
+            ("time_ms", "f8"), ("price", "f8"), ("ema_fast", "f8"), ("ema_slow", "f8"),
+            ("supertrend", "f8"), ("signal", "i1"),
+        ])
+        self.hub = BroadcastHub(
+            self.next_batch, interval=interval, queue_size=queue_size, policy=policy,
+            formats={"json": JsonFormat(), "binary": BinaryFormat(self.recent.column("time_ms"), self.snapshot)},
+        )
+
+    def load(self):
+        """Open the bricks and indicators (built once, then memory-mapped from the on-disk cache)."""
+        from renko_cache import open_cached
+        self.columns = open_cached(self.path, **self.params)
+        if self.journal_path is not None:
+            self.journal = Journal(self.journal_path, meta={"source": os.path.abspath(self.path), "params": self.params})
+            if self.resume():
+                return self
+        if len(self) > self.start:
+            self.rewind()  # so the first binary client already gets a full snapshot
+        return self
+
+    def resume(self):
+        """Continue after the last journaled brick; ``False`` if the journal does not match the bricks."""
+        from indicators import IndicatorValues
+        records = self.journal.records
+        if not len(records):
+            return False
+        last = records[-1]
+        bar = int(last["bar"])
+        c = self.columns
+        if not self.start <= bar < len(self) or c["Date"][bar] != last["date"] or c["Close"][bar] != last["close"]:
+            return False  # bricks were rebuilt since; start over (the old records stay in the journal)
+
+        # Roll the checkpointed engine forward over the records written after it
+        count, engine = self.journal.checkpoint()
+        values = None
+        if engine is None:
+            engine, values = self.warm_indicators(bar + 1)
+        else:
+            expected = int(records[count - 1]["bar"]) + 1
+            for rec in records[count:]:
+                b = int(rec["bar"])
+                if b != expected:
+                    engine, _ = self.warm_indicators(b)  # the replay looped after the checkpoint
+                values = engine.update(rec["high"], rec["low"], rec["close"])
+                expected = b + 1
+        if values is not None and not np.allclose(values, [last[k] for k in IndicatorValues._fields], equal_nan=True):
+            return False  # checkpoint from other parameters or code
+
+        self.engine = engine
+        self.prev = IndicatorValues(*(float(last[k]) for k in IndicatorValues._fields))
+        self.i = bar + 1
+        self.restarts += 1
+        self.backfill()
+        return True
+
+    def __len__(self):
+        return 0 if self.columns is None else len(self.columns["Close"])
+
+    def warm_indicators(self, upto):
+        """An indicator engine primed on bricks ``0..upto-1`` and its values at ``upto - 1``.
+
+        Primed in one vectorised pass (``indicator_arrays``) rather than brick
+        by brick; the replay start is primed once and copied on every rewind.
+        """
+        from indicators import IndicatorValues, indicator_arrays
+        if upto == self.start and self._primed is not None:
+            return copy.deepcopy(self._primed)
+        c = self.columns
+        columns, engine = indicator_arrays(c["High"][:upto], c["Low"][:upto], c["Close"][:upto],
+                                           **{k: v for k, v in self.params.items() if k != "brick_size"})
+        values = IndicatorValues(*(float(columns[k][-1]) for k in IndicatorValues._fields)) if upto else None
+        if upto == self.start:
+            self._primed = copy.deepcopy((engine, values))
+        return engine, values
+
+    def next_update(self):
+        c = self.columns
+        dates, opens, highs, lows, closes = c["Date"], c["Open"], c["High"], c["Low"], c["Close"]
+        if len(closes) <= self.start:
+            return None  # not enough bricks to replay
+        if self.engine is None or self.i >= len(closes):
+            self.rewind()  # loop for demo
+        i = self.i
+        with metrics.stage("feed_indicators"):
+            curr = self.engine.update(highs[i], lows[i], closes[i])
+        prev = self.prev
+
+        # Determine signal
+        with metrics.stage("feed_signal"):
+            signal = ""
+            if curr.supertrend < closes[i] and prev.ema_fast > prev.ema_slow and lows[i-1] < prev.ema_slow and closes[i] > opens[i]:
+                signal = "BUY"
+            elif curr.supertrend > closes[i] and prev.ema_fast < prev.ema_slow and highs[i-1] > prev.ema_slow and closes[i] < opens[i]:
+                signal = "SELL"
+
+        self.prev = curr
+        self.i += 1
+        code = SIGNAL_CODES.get(signal, 0)
+        self.recent.append(dates[i] / 1e6, closes[i], curr.ema_fast, curr.ema_slow, curr.supertrend, code)
+        if self.journal is not None:
+            self.journal.append(bar=i, date=dates[i], open=opens[i], high=highs[i], low=lows[i], close=closes[i],
+                                ema_fast=curr.ema_fast, ema_slow=curr.ema_slow, supertrend=curr.supertrend,
+                                direction=curr.direction, signal=code)
+        return {
+            "timestamp": _timestamp(dates[i]),
+            "price": float(closes[i]),
+            "ema100": curr.ema_fast,
+            "ema300": curr.ema_slow,
+            "supertrend": curr.supertrend,
+            "signal": signal
+        }
+
+    def rewind(self):
+        """Go back to the replay start with warmed-up indicators."""
+        self.i = self.start
+        self.engine, self.prev = self.warm_indicators(self.i)
+        self.restarts += 1
+        self.backfill()
+
+    def backfill(self):
+        """Restart ``recent`` with the bars before ``i``; signals come from the journal when it has them."""
+        c, recent = self.columns, self.recent
+        lo = max(0, self.i - recent.capacity)
+        signal = np.zeros(self.i - lo, dtype=np.int8)
+        if self.journal is not None:
+            # Only the current pass over the bricks: the run of consecutive bars ending at bar i - 1
+            tail = self.journal.tail(self.i - lo)
+            breaks = np.flatnonzero(np.diff(tail["bar"]) != 1)
+            run = tail[breaks[-1] + 1:] if breaks.size else tail
+            if len(run) and run["bar"][-1] == self.i - 1:
+                run = run[run["bar"] >= lo]
+                signal[run["bar"] - lo] = run["signal"]
+        recent.reset(lo)
+        recent.extend({
+            "time_ms": c["Date"][lo:self.i] / 1e6, "price": c["Close"][lo:self.i],
+            "ema_fast": c["EMA_fast"][lo:self.i], "ema_slow": c["EMA_slow"][lo:self.i],
+            "supertrend": c["ST"][lo:self.i], "signal": signal,
+        })
+
+    def next_batch(self):
+        """``(brick index, update)`` pairs for this tick; the hub encodes them per format."""
+        batch = []
+        for _ in range(self.bricks_per_tick):
+            if batch and self.i >= len(self):
+                break  # the replay wraps next: rows from before and after a rewind never share a batch
+            restarts = self.restarts
+            update = self.next_update()
+            if update is None:
+                break
+            if restarts and self.restarts != restarts:
+                self.hub.resync()  # replay wrapped around: binary clients start from a new snapshot
+            i = self.i - 1
+            if self.on_bar is not None:
+                c = self.columns
+                self.on_bar(c["Close"][i], c["High"][i], c["Low"][i], update["supertrend"],
+                            SIGNAL_CODES.get(update["signal"], 0))
+            batch.append((i, update))
+        if self.journal is not None and self.journal.due():
+            with metrics.stage("journal_sync", items=self.journal.sync_every):
+                self.journal.sync(self.engine)
+        return batch or None
+
+    async def stop(self):
+        """Pause the producer (the next subscriber restarts it) and make the journal durable."""
+        await self.hub.stop()
+        if self.journal is not None:
+            self.journal.sync(self.engine)
+
+    async def close(self):
+        await self.stop()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def purge(self, bricks=False):
+        """Delete this setting's files on disk - journal, its checkpoint and indicator cache -
+        and with ``bricks`` its brick series too.  Call after ``close``."""
+        from renko_cache import remove_cached
+        remove_cached(self.path, bricks=bricks, **self.params)
+        if self.journal_path is not None:
+            for suffix in ("", ".state", ".tmp", ".state.tmp"):
+                try:
+                    os.remove(self.journal_path + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def snapshot(self, bars=500, points=500):
+        recent = self.recent
+        c = {name: recent.column(name) for name in recent.names}
+        return [snapshot_frame(c["time_ms"], c["price"], c["ema_fast"], c["ema_slow"], c["supertrend"], c["signal"],
+                               recent.total, bars, points, first=recent.first)]
+
+
+class _Entry:
+    def __init__(self, task):
+        self.task = task
+        self.leases = 0
+        self.pinned = False
+
+    @property
+    def stream(self):
+        """The loaded stream, or ``None`` while loading or if loading failed."""
+        task = self.task
+        if task.done() and not task.cancelled() and task.exception() is None:
+            return task.result()
+        return None
+
+
+class StreamCache:
+    """At most ``size`` streams built by ``factory(key)``, least recently used evicted first.
+
+    ``factory`` returns an unloaded stream; ``load`` runs in a thread.
+    ``acquire`` and ``release`` bracket each client; streams with clients
+    are never evicted, and an unpinned stream is paused when its last
+    client leaves.
+    """
+
+    def __init__(self, factory, size=8):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self._entries = collections.OrderedDict()
+        self.counts = {"hits": 0, "misses": 0, "evictions": 0, "rejected": 0, "failed": 0}
+
+    async def acquire(self, key, pin=False):
+        """The loaded stream for ``key``, leased to the caller; ``None`` if the cache is full."""
+        entry = self._entries.get(key)
+        while entry is None and len(self._entries) >= self.size:
+            if not await self._evict():
+                self.counts["rejected"] += 1
+                return None
+            # Other clients may have started this key, or taken the freed slot, while the eviction awaited
+            entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.counts["hits"] += 1
+        else:
+            self.counts["misses"] += 1
+            entry = _Entry(asyncio.ensure_future(asyncio.to_thread(self.factory(key).load)))
+            self._entries[key] = entry
+        entry.leases += 1
+        entry.pinned = entry.pinned or pin
+        try:
+            # Shielded: one client giving up must not cancel a build others wait on
+            return await asyncio.shield(entry.task)
+        except BaseException:
+            entry.leases -= 1
+            if entry.task.done() and entry.stream is None:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                    self.counts["failed"] += 1
+            raise
+
+    async def release(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.leases -= 1
+        if entry.leases == 0 and not entry.pinned and entry.stream is not None:
+            await entry.stream.stop()  # idle until the next client; restarts on subscribe
+
+    async def _evict(self):
+        for key, entry in self._entries.items():
+            if entry.leases == 0 and not entry.pinned and entry.task.done():
+                del self._entries[key]
+                self.counts["evictions"] += 1
+                if entry.stream is not None:
+                    await entry.stream.close()
+                    # Its disk cache goes too unless the key came back meanwhile; the
+                    # bricks stay while another cached setting uses the brick size
+                    if key not in self._entries:
+                        entry.stream.purge(bricks=all(k[0] != key[0] for k in self._entries))
+                return True
+        return False
+
+    async def close(self):
+        for entry in self._entries.values():
+            if entry.stream is not None:
+                await entry.stream.close()
+            else:
+                entry.task.cancel()
+
+    def stats(self):
+        lookups = self.counts["hits"] + self.counts["misses"]
+        streams = []
+        for key, entry in reversed(self._entries.items()):  # most recently used first
+            stream = entry.stream
+            streams.append(dict(key_params(key), clients=entry.leases, pinned=entry.pinned,
+                                loading=not entry.task.done(), bricks=len(stream) if stream is not None else None))
+        return dict(self.counts, hit_rate=self.counts["hits"] / lookups if lookups else None,
+                    size=len(self._entries), capacity=self.size, streams=streams)
@@ -0,0 +1,24 @@
+// Decoder for the binary /ws/chart?protocol=binary frames (see web/backend/protocol.py).
+export const SNAPSHOT = 1;
+export const DELTA = 2;
+
+const HEADER_BYTES = 8;
+
+// Returns { kind, rows, time, price, emaFast, emaSlow, supertrend, signal };
+// the columns are typed-array views on `buffer`, nothing is copied.
+export function decodeFrame(buffer) {
+  const view = new DataView(buffer);
+  const kind = view.getUint8(0);
+  const rows = view.getUint32(4, true);
+  let offset = HEADER_BYTES;
+  const time = new Float64Array(buffer, offset, rows);
+  offset += 8 * rows;
+  const floats = [];
+  for (let k = 0; k < 4; k++) {
+    floats.push(new Float32Array(buffer, offset, rows));
+    offset += 4 * rows;
+  }
+  const signal = new Int8Array(buffer, offset, rows);
+  const [price, emaFast, emaSlow, supertrend] = floats;
+  return { kind, rows, time, price, emaFast, emaSlow, supertrend, signal };
+}
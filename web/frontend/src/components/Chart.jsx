@@ -1,9 +1,15 @@
 import { useEffect, useRef, useState } from "react";
 import Chart from "chart.js/auto";
+import { SNAPSHOT, decodeFrame } from "../chartProtocol";
+
+const MAX_POINTS = 500;
+const SIGNAL_COLORS = { 1: "green", "-1": "red", 0: "transparent" };
 
 export default function LiveChart() {
   const chartRef = useRef(null);
   const [chartInstance, setChartInstance] = useState(null);
+  const [status, setStatus] = useState("connecting");
+  const [detail, setDetail] = useState("");
 
   useEffect(() => {
     const ctx = chartRef.current.getContext("2d");
@@ -12,42 +18,71 @@ export default function LiveChart() {
       data: {
         labels: [],
         datasets: [
-          { label: "Price", data: [], borderColor: "green", tension: 0.3 },
+          { label: "Price", data: [], borderColor: "green", tension: 0.3, pointBackgroundColor: [] },
           { label: "EMA100", data: [], borderColor: "orange", tension: 0.3 },
           { label: "EMA300", data: [], borderColor: "red", tension: 0.3 },
           { label: "Supertrend", data: [], borderColor: "blue", borderDash: [5,5], tension: 0.3 },
         ],
       },
-      options: { responsive: true, plugins: { legend: { position: "top" } } },
+      options: { responsive: true, animation: false, plugins: { legend: { position: "top" } } },
     });
     setChartInstance(chart);
 
-    const socket = new WebSocket("ws://127.0.0.1:8000/ws/chart");
+    // Snapshot of recent bars first, then binary deltas (one or more bricks each)
+    const socket = new WebSocket(`ws://127.0.0.1:8000/ws/chart?protocol=binary&bars=${MAX_POINTS}&points=${MAX_POINTS}`);
+    socket.binaryType = "arraybuffer";
     socket.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      if (!chart) return;
-
-      chart.data.labels.push(data.timestamp);
-      chart.data.datasets[0].data.push(data.price);
-      chart.data.datasets[1].data.push(data.ema100);
-      chart.data.datasets[2].data.push(data.ema300);
-      chart.data.datasets[3].data.push(data.supertrend);
-
-      // Add signal as dot
-      if (data.signal === "BUY") chart.data.datasets[0].pointBackgroundColor?.push("green");
-      else if (data.signal === "SELL") chart.data.datasets[0].pointBackgroundColor?.push("red");
-      else chart.data.datasets[0].pointBackgroundColor?.push("transparent");
-
-      // Keep last 50 points
-      if (chart.data.labels.length > 50) {
-        chart.data.labels.shift();
-        chart.data.datasets.forEach(d => d.data.shift());
-        chart.data.datasets.forEach(d => d.pointBackgroundColor?.shift());
+      // Text frames are server status, e.g. {"status": "warming_up"} during startup or
+      // {"status": "insufficient_data", "detail": ...} before the server closes the socket
+      if (typeof event.data === "string") {
+        const message = JSON.parse(event.data);
+        setStatus(message.status);
+        setDetail(message.detail || "");
+        return;
+      }
+      setStatus("live");
+      const frame = decodeFrame(event.data);
+      const [price, ema100, ema300, supertrend] = chart.data.datasets;
+
+      if (frame.kind === SNAPSHOT) {
+        chart.data.labels = [];
+        chart.data.datasets.forEach(d => { d.data = []; });
+        price.pointBackgroundColor = [];
+      }
+
+      for (let k = 0; k < frame.rows; k++) {
+        chart.data.labels.push(new Date(frame.time[k]).toISOString().slice(0, 19).replace("T", " "));
+        price.data.push(frame.price[k]);
+        ema100.data.push(frame.emaFast[k]);
+        ema300.data.push(frame.emaSlow[k]);
+        supertrend.data.push(Number.isNaN(frame.supertrend[k]) ? null : frame.supertrend[k]);
+        // Add signal as dot
+        price.pointBackgroundColor.push(SIGNAL_COLORS[frame.signal[k]]);
       }
 
-      chart.update();
+      // Keep last MAX_POINTS points
+      const excess = chart.data.labels.length - MAX_POINTS;
+      if (excess > 0) {
+        chart.data.labels.splice(0, excess);
+        chart.data.datasets.forEach(d => d.data.splice(0, excess));
+        price.pointBackgroundColor.splice(0, excess);
+      }
+
+      chart.update("none");
+    };
+
+    return () => {
+      socket.close();
+      chart.destroy();
     };
   }, []);
 
-  return <canvas ref={chartRef} style={{ width: "100%", height: "500px" }} />;
+  return (
+    <div>
+      {status !== "live" && <p>{status === "warming_up" ? "Server is warming up…"
+        : status === "insufficient_data" ? `Not enough data for these settings: ${detail}`
+        : "Connecting…"}</p>}
+      <canvas ref={chartRef} style={{ width: "100%", height: "500px" }} />
+    </div>
+  );
 }